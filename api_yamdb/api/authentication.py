@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed, InvalidToken
+)
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from reviews.models import UserRoleMixin
+from reviews.utils import get_cached_user, has_actual_claims
+
+from .cache import CacheStats
+
+User = get_user_model()
+
+
+class TokenCache:
+    """
+    LRU-кэш процесса проверенных токенов: подпись и JSON токена
+    проверяются один раз, запись удаляется по истечении `exp`.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tokens = OrderedDict()
+        self.stats = CacheStats()
+
+    def get(self, raw_token):
+        with self.lock:
+            expires, token = self.tokens.get(raw_token, (0, None))
+            if token is not None and expires <= time.time():
+                del self.tokens[raw_token]
+                token = None
+            if token is not None:
+                self.tokens.move_to_end(raw_token)
+        if token is None:
+            self.stats.miss()
+        else:
+            self.stats.hit()
+        return token
+
+    def set(self, raw_token, token):
+        max_size = settings.TOKEN_CACHE['MAX_SIZE']
+        if not max_size or 'exp' not in token:
+            return
+        with self.lock:
+            self.tokens[raw_token] = (token['exp'], token)
+            self.tokens.move_to_end(raw_token)
+            while len(self.tokens) > max_size:
+                self.tokens.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.tokens.clear()
+
+    def as_dict(self):
+        with self.lock:
+            size = len(self.tokens)
+        return {**self.stats.as_dict(), 'size': size}
+
+
+token_cache = TokenCache()
+
+
+class ClaimsTokenUser(UserRoleMixin, TokenUser):
+    """Пользователь, восстановленный из данных токена без запроса к базе"""
+
+    @cached_property
+    def role(self):
+        return self.token['role']
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Аутентификация по JWT без запроса к базе для чтения: роль, is_staff
+    и username берутся из токена, если пользователь не менялся после его
+    выдачи. Запросы на изменение получают полного пользователя из
+    кэша процесса. Проверенные токены хранятся в `token_cache`.
+    """
+
+    def authenticate(self, request):
+        self.request_method = request.method
+        return super().authenticate(request)
+
+    def get_validated_token(self, raw_token):
+        token = token_cache.get(raw_token)
+        if token is None:
+            token = super().get_validated_token(raw_token)
+            token_cache.set(raw_token, token)
+        return token
+
+    def get_user(self, validated_token):
+        if (self.request_method in SAFE_METHODS
+                and has_actual_claims(validated_token)):
+            return ClaimsTokenUser(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification')
+            )
+        try:
+            user = get_cached_user(user_id)
+        except User.DoesNotExist:
+            raise AuthenticationFailed(
+                _('User not found'), code='user_not_found'
+            )
+        if not user.is_active:
+            raise AuthenticationFailed(
+                _('User is inactive'), code='user_inactive'
+            )
+        return user
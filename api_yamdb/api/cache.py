@@ -0,0 +1,135 @@
+import threading
+from hashlib import md5
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag, urlencode
+from rest_framework.response import Response
+
+from reviews.cache import get_cache, get_versions
+
+RESPONSE_KEY = 'response:{}:{}:{}'
+CACHE_HEADER = 'X-Cache'
+CONDITIONAL_FORMATS = ('json',)
+
+
+class CacheStats:
+    """Счётчики попаданий и промахов кэша ответов процесса"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self):
+        with self.lock:
+            self.hits += 1
+
+    def miss(self):
+        with self.lock:
+            self.misses += 1
+
+    def as_dict(self):
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+response_cache_stats = CacheStats()
+
+
+def normalize_query(query_params):
+    """Строка запроса, не зависящая от порядка параметров"""
+    return urlencode(sorted(
+        (key, value)
+        for key in query_params
+        for value in sorted(query_params.getlist(key))
+    ))
+
+
+class CacheVersionsMixin:
+    """
+    Версии данных, от которых зависит ответ вьюсета. Версии меняются
+    при любой записи в соответствующие модели (см. reviews.cache).
+    """
+    cache_versions = ()
+
+    def get_cache_versions(self):
+        return self.cache_versions
+
+
+class AnonymousListCacheMixin(CacheVersionsMixin):
+    """
+    Кэширование данных списка для анонимных пользователей.
+    Ключ включает схему и хост (ссылки `next`/`previous` в данных
+    абсолютные), нормализованную строку запроса и версии данных.
+    """
+
+    def get_cache_key(self, request):
+        url = '{}://{}?{}'.format(
+            request.scheme, request.get_host(),
+            normalize_query(request.query_params)
+        )
+        return RESPONSE_KEY.format(
+            self.basename,
+            '.'.join(map(str, get_versions(*self.get_cache_versions()))),
+            md5(url.encode()).hexdigest()
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not request.user.is_anonymous:
+            return super().list(request, *args, **kwargs)
+        cache = get_cache()
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            response_cache_stats.hit()
+            response = Response(data)
+            response[CACHE_HEADER] = 'HIT'
+            return response
+        response_cache_stats.miss()
+        response = super().list(request, *args, **kwargs)
+        cache.set(key, response.data, settings.RESPONSE_CACHE['TIMEOUT'])
+        response[CACHE_HEADER] = 'MISS'
+        return response
+
+
+class ConditionalGetMixin(CacheVersionsMixin):
+    """
+    ETag и Last-Modified для списка и объекта, вычисляемые по версиям
+    данных без обращения к базе. При совпадении If-None-Match или
+    If-Modified-Since возвращается 304 без выборки и сериализации.
+    """
+
+    def get_validators(self, request):
+        versions = get_versions(*self.get_cache_versions())
+        etag = md5('{}?{}:{}'.format(
+            request.path,
+            normalize_query(request.query_params),
+            '.'.join(map(str, versions))
+        ).encode()).hexdigest()
+        # версии - метки времени создания в наносекундах
+        return quote_etag(etag), max(versions) // 10 ** 9
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        if request.accepted_renderer.format not in CONDITIONAL_FORMATS:
+            return handler(request, *args, **kwargs)
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
@@ -1,13 +1,53 @@
+from django.db.models import Q
 from django_filters import rest_framework as filters
+from rest_framework.filters import OrderingFilter, SearchFilter
 
 from reviews.models import Title
+from reviews.search import prefix_lookup, search_titles
 
 
 class TitleFilter(filters.FilterSet):
     category = filters.CharFilter(field_name='category__slug')
     genre = filters.CharFilter(field_name='genre__slug')
-    name = filters.CharFilter(field_name='name', lookup_expr='contains')
+    name = filters.CharFilter(method='filter_name')
+    search = filters.CharFilter(method='filter_search')
+    rating_min = filters.NumberFilter(field_name='rating', lookup_expr='gte')
+    rating_max = filters.NumberFilter(field_name='rating', lookup_expr='lte')
 
     class Meta:
         model = Title
         fields = ('category', 'genre', 'name', 'year')
+
+    def filter_name(self, queryset, name, value):
+        return queryset.filter(prefix_lookup('name_normalized', value))
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
+
+
+class TitleOrderingFilter(OrderingFilter):
+    """Сортировка по релевантности при полнотекстовом поиске"""
+
+    def get_ordering(self, request, queryset, view):
+        if (not request.query_params.get(self.ordering_param)
+                and 'search_rank' in queryset.query.annotations):
+            return ('search_rank', 'id')
+        return super().get_ordering(request, queryset, view)
+
+
+class NormalizedSearchFilter(SearchFilter):
+    """
+    Поиск без учёта регистра по началу строки в нормализованных полях
+    `search_fields` вьюсета.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+        if not search_fields or not search_terms:
+            return queryset
+        value = ' '.join(search_terms)
+        conditions = Q()
+        for field in search_fields:
+            conditions |= prefix_lookup(field, value)
+        return queryset.filter(conditions)
@@ -0,0 +1,228 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from .authentication import token_cache
+from .cache import response_cache_stats
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+SECONDS_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERIES_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+# Методы, учитываемые в метках по отдельности, остальные - `other`
+METHODS = frozenset(
+    ('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS')
+)
+OTHER_METHOD = 'other'
+# Имя, описание и границы корзин гистограмм запросов
+HISTOGRAMS = (
+    ('yamdb_request_duration_seconds', 'Время обработки запроса',
+     SECONDS_BUCKETS),
+    ('yamdb_request_queries', 'Количество запросов к базе', QUERIES_BUCKETS),
+    ('yamdb_request_sql_seconds', 'Время запросов к базе', SECONDS_BUCKETS),
+    ('yamdb_request_serialization_seconds', 'Время сериализации ответа',
+     SECONDS_BUCKETS),
+)
+
+current_record = ContextVar('request_metrics', default=None)
+
+
+class RequestRecord:
+    """Счётчики одного запроса"""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql = 0.0
+        self.serialization = 0.0
+
+    def execute(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql += time.perf_counter() - start
+            self.queries += 1
+
+
+@contextmanager
+def measure_serialization():
+    """Учёт времени блока как времени сериализации текущего запроса"""
+    record = current_record.get()
+    if record is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record.serialization += time.perf_counter() - start
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bucket, count in zip((*self.buckets, '+Inf'), self.counts):
+            total += count
+            yield bucket, total
+
+
+class RequestMetrics:
+    """Гистограммы запросов процесса по маршруту и методу"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+
+    def observe(self, route, method, values):
+        with self.lock:
+            histograms = self.histograms.get((route, method))
+            if histograms is None:
+                histograms = self.histograms[(route, method)] = [
+                    Histogram(buckets) for _, _, buckets in HISTOGRAMS
+                ]
+            for histogram, value in zip(histograms, values):
+                histogram.observe(value)
+
+    def clear(self):
+        with self.lock:
+            self.histograms.clear()
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for index, (name, help_text, _) in enumerate(HISTOGRAMS):
+                lines += [f'# HELP {name} {help_text}',
+                          f'# TYPE {name} histogram']
+                for (route, method), histograms in self.histograms.items():
+                    labels = (f'route="{escape_label(route)}",'
+                              f'method="{escape_label(method)}"')
+                    histogram = histograms[index]
+                    lines += [
+                        f'{name}_bucket{{{labels},le="{bucket}"}} {count}'
+                        for bucket, count in histogram.cumulative()
+                    ]
+                    lines += [
+                        f'{name}_sum{{{labels}}} {histogram.sum}',
+                        f'{name}_count{{{labels}}} {histogram.count}',
+                    ]
+        return lines
+
+
+request_metrics = RequestMetrics()
+
+
+def escape_label(value):
+    return (value.replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def render_counters(name, help_text, stats):
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+    lines += [f'{name}{{result="{result}"}} {stats[result]}'
+              for result in ('hits', 'misses')]
+    return lines
+
+
+def render_metrics():
+    """Метрики процесса в текстовом формате Prometheus"""
+    lines = request_metrics.render()
+    lines += render_counters(
+        'yamdb_response_cache_requests_total', 'Обращения к кэшу ответов',
+        response_cache_stats.as_dict()
+    )
+    lines += render_counters(
+        'yamdb_token_cache_requests_total',
+        'Обращения к кэшу проверенных токенов', token_cache.as_dict()
+    )
+    return '\n'.join(lines) + '\n'
+
+
+class RequestMetricsMiddleware:
+    """
+    Запись количества и времени запросов к базе, времени сериализации и
+    общего времени обработки в гистограммы по маршруту и методу.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        record = RequestRecord()
+        token = current_record.set(record)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(record.execute):
+                response = self.get_response(request)
+        finally:
+            current_record.reset(token)
+        duration = time.perf_counter() - start
+        if request.resolver_match is not None:
+            method = request.method
+            if method not in METHODS:
+                # произвольные методы не создают новых гистограмм
+                method = OTHER_METHOD
+            request_metrics.observe(
+                request.resolver_match.route, method,
+                (duration, record.queries, record.sql, record.serialization)
+            )
+        return response
+
+
+class MeasuredSerializerMixin:
+    """Учёт времени получения данных сериализатора"""
+
+    @property
+    def data(self):
+        with measure_serialization():
+            return super().data
+
+
+class MeasuredListSerializer(MeasuredSerializerMixin,
+                             serializers.ListSerializer):
+    pass
+
+
+class MeasuredModelSerializer(MeasuredSerializerMixin,
+                              serializers.ModelSerializer):
+    """
+    ModelSerializer с учётом времени сериализации; для `many=True`
+    по умолчанию используется `MeasuredListSerializer`
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        meta = getattr(cls, 'Meta', None)
+        if meta is not None and not hasattr(meta, 'list_serializer_class'):
+            meta.list_serializer_class = MeasuredListSerializer
+
+
+class MeasuredJSONRenderer(JSONRenderer):
+    """JSONRenderer с учётом времени в метриках сериализации"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with measure_serialization():
+            return super().render(data, accepted_media_type, renderer_context)
@@ -0,0 +1,197 @@
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    _reverse_ordering, CursorPagination, PageNumberPagination
+)
+
+CURSOR_MODE = 'cursor'
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Курсорная пагинация по составному ключу: позиция курсора содержит
+    значения всех полей сортировки, последнее из которых - уникальный `id`,
+    поэтому OFFSET не используется при любом количестве равных значений.
+    NULL в полях сортировки (например, `rating` без отзывов) хранится
+    в позиции как `null` и, как в SQLite, считается меньше любого значения,
+    поэтому набор и порядок строк совпадают с постраничным режимом.
+    """
+    tiebreaker = 'id'
+    nullable = frozenset()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.nullable = self.get_nullable(queryset.model, self.ordering)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            reverse, position = False, None
+        else:
+            _, reverse, position = self.cursor
+        queryset = queryset.order_by(
+            *(_reverse_ordering(self.ordering) if reverse else self.ordering)
+        )
+        if position is not None:
+            queryset = queryset.filter(
+                self.get_position_filter(position, reverse)
+            )
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        following_position = (
+            self._get_position_from_instance(results[-1], self.ordering)
+            if len(results) > len(self.page) else None
+        )
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = following_position is not None
+            self.next_position = position
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = position is not None
+            self.next_position = following_position
+            self.previous_position = position
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if ordering[-1].lstrip('-') in (self.tiebreaker, 'pk'):
+            return ordering
+        direction = '-' if ordering[0].startswith('-') else ''
+        return (*ordering, direction + self.tiebreaker)
+
+    @staticmethod
+    def get_nullable(model, ordering):
+        """Поля сортировки, допускающие NULL"""
+        nullable = set()
+        for order in ordering:
+            field = order.lstrip('-')
+            try:
+                if model._meta.get_field(field).null:
+                    nullable.add(field)
+            except FieldDoesNotExist:
+                pass
+        return frozenset(nullable)
+
+    def get_position_filter(self, position, reverse):
+        """
+        Строки после позиции в порядке сортировки:
+        `a > x OR (a = x AND id > y)` с ограничением `a >= x`, по которому
+        база находит начало страницы в индексе
+        """
+        values = json.loads(position)
+        conditions = []
+        equal = Q()
+        for order, value in zip(self.ordering, values):
+            field = order.lstrip('-')
+            lookup = self.get_lookup(order, reverse)
+            conditions.append(equal & self.compare(field, lookup, value))
+            equal &= self.compare(field, 'exact', value)
+        first = self.ordering[0]
+        bound = self.compare(
+            first.lstrip('-'), self.get_lookup(first, reverse) + 'e',
+            values[0]
+        )
+        return bound & reduce(or_, conditions)
+
+    def compare(self, field, lookup, value):
+        """Условие `field <lookup> value`, в котором NULL меньше значений"""
+        isnull = f'{field}__isnull'
+        if field not in self.nullable:
+            return Q(**{f'{field}__{lookup}': value})
+        if value is None:
+            return {
+                'exact': Q(**{isnull: True}),
+                'lte': Q(**{isnull: True}),
+                'gt': Q(**{isnull: False}),
+                'gte': Q(),
+                # меньше NULL ничего нет
+                'lt': Q(pk__in=()),
+            }[lookup]
+        condition = Q(**{f'{field}__{lookup}': value})
+        if lookup in ('lt', 'lte'):
+            condition |= Q(**{isnull: True})
+        return condition
+
+    @staticmethod
+    def get_lookup(order, reverse):
+        return 'lt' if order.startswith('-') != reverse else 'gt'
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None or cursor.position is None:
+            return cursor
+        try:
+            values = json.loads(cursor.position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def _get_position_from_instance(self, instance, ordering):
+        return json.dumps([
+            getattr(instance, order.lstrip('-')) for order in ordering
+        ], default=str)
+
+
+class PageNumberOrCursorPagination(PageNumberPagination):
+    """
+    Постраничная пагинация, переключаемая на курсорную параметром
+    `?pagination=cursor`. Курсорный режим не выполняет COUNT(*) и OFFSET,
+    поэтому время ответа не зависит от номера страницы.
+    """
+    mode_query_param = 'pagination'
+    cursor_pagination_class = KeysetCursorPagination
+    ordering = ('id',)
+    cursor_paginator = None
+
+    def is_cursor_mode(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == CURSOR_MODE
+            or self.cursor_pagination_class.cursor_query_param
+            in request.query_params
+        )
+
+    def get_cursor_paginator(self):
+        paginator = self.cursor_pagination_class()
+        paginator.ordering = self.ordering
+        paginator.page_size = self.page_size
+        return paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_cursor_mode(request):
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_paginator = self.get_cursor_paginator()
+        return self.cursor_paginator.paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is None:
+            return super().get_paginated_response(data)
+        return self.cursor_paginator.get_paginated_response(data)
+
+    def to_html(self):
+        if self.cursor_paginator is None:
+            return super().to_html()
+        return self.cursor_paginator.to_html()
+
+
+class TitlePagination(PageNumberOrCursorPagination):
+    ordering = ('name', 'id')
+
+
+class ReviewCommentPagination(PageNumberOrCursorPagination):
+    ordering = ('pub_date', 'id')
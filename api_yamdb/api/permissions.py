@@ -20,8 +20,9 @@ class IsAdminOrIsModeratorOrIsAuthorOrReadOnly(
     IsAuthenticatedOrReadOnly, IsAdminOrReadOnly
 ):
     def has_object_permission(self, request, view, obj):
+        # сравнение по author_id не загружает автора из базы
         return (
             IsAdminOrReadOnly.has_permission(self, request, view)
-            or obj.author == request.user
             or request.user.is_moderator
+            or obj.author_id == request.user.pk
         )
@@ -1,8 +1,11 @@
-from django.shortcuts import get_object_or_404
+from django.db.utils import IntegrityError
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
-from rest_framework.relations import SlugRelatedField
+from rest_framework.relations import (
+    ManyRelatedField, MANY_RELATION_KWARGS, SlugRelatedField
+)
 
+from .metrics import MeasuredModelSerializer
 from reviews.models import Category, Comment, Genre, Review, Title, User
 from reviews.validators import UsernameMeValidator, UsernameValidator
 
@@ -19,7 +22,7 @@ class ValidateUsernameMixin:
         return username
 
 
-class UserSerializer(serializers.ModelSerializer, ValidateUsernameMixin):
+class UserSerializer(MeasuredModelSerializer, ValidateUsernameMixin):
 
     class Meta:
         model = User
@@ -51,21 +54,57 @@ class SignUpSerializer(serializers.Serializer, ValidateUsernameMixin):
         fields = '__all__'
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class BulkManyRelatedField(ManyRelatedField):
+    """Получение всех объектов списка слагов одним запросом с IN"""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        child = self.child_relation
+        if any(not isinstance(slug, str) for slug in data):
+            child.fail('invalid')
+        objects = {
+            getattr(obj, child.slug_field): obj
+            for obj in child.get_queryset().filter(
+                **{f'{child.slug_field}__in': set(data)}
+            )
+        }
+        for slug in data:
+            if slug not in objects:
+                child.fail(
+                    'does_not_exist', slug_name=child.slug_field, value=slug
+                )
+        return [objects[slug] for slug in dict.fromkeys(data)]
+
+
+class BulkSlugRelatedField(SlugRelatedField):
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+
+class CategorySerializer(MeasuredModelSerializer):
 
     class Meta:
-        exclude = ('id',)
+        exclude = ('id', 'name_normalized')
         model = Category
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(MeasuredModelSerializer):
 
     class Meta:
-        exclude = ('id',)
+        exclude = ('id', 'name_normalized')
         model = Genre
 
 
-class TitleGetSerializer(serializers.ModelSerializer):
+class TitleGetSerializer(MeasuredModelSerializer):
     genre = GenreSerializer(many=True)
     category = CategorySerializer()
     rating = serializers.IntegerField(read_only=True)
@@ -79,7 +118,7 @@ class TitleGetSerializer(serializers.ModelSerializer):
 
 
 class TitleSerializer(TitleGetSerializer):
-    genre = SlugRelatedField(
+    genre = BulkSlugRelatedField(
         queryset=Genre.objects.all(), slug_field='slug', many=True
     )
     category = SlugRelatedField(
@@ -90,30 +129,48 @@ class TitleSerializer(TitleGetSerializer):
         fields = ('id', 'name', 'year', 'description', 'genre', 'category')
         model = Title
 
-
-class ReviewSerializer(serializers.ModelSerializer):
+    def create(self, validated_data):
+        genres = validated_data.pop('genre')
+        title = super().create(validated_data)
+        title.genre.add(*genres)
+        return title
+
+    def update(self, instance, validated_data):
+        genres = validated_data.pop('genre', None)
+        title = super().update(instance, validated_data)
+        if genres is not None:
+            # изменить только добавленные и удалённые связи
+            current = set(title.genre.values_list('pk', flat=True))
+            new = {genre.pk for genre in genres}
+            if current - new:
+                title.genre.remove(*(current - new))
+            if new - current:
+                title.genre.add(*(new - current))
+        return title
+
+
+class ReviewSerializer(MeasuredModelSerializer):
     author = SlugRelatedField(slug_field='username', read_only=True)
 
     class Meta:
         model = Review
         exclude = ('title',)
 
-    def validate(self, attrs):
-        if self.context['request'].method != 'POST':
-            return super().validate(attrs)
-        title = get_object_or_404(
-            Title,
-            id=self.context['request'].parser_context['kwargs'].get('title_id')
-        )
-        author = self.context['request'].user
-        if author and author.reviews.filter(title=title):
+    def create(self, validated_data):
+        # уникальность отзыва проверяет ограничение unique_review в базе
+        try:
+            return super().create(validated_data)
+        except IntegrityError:
+            title = validated_data['title']
+            author = validated_data['author']
+            if not Review.objects.filter(title=title, author=author).exists():
+                raise
             raise ValidationError({'detail': UNIQUE_REVIEW_ERROR.format(
                 author, title.name
             )})
-        return super().validate(attrs)
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(MeasuredModelSerializer):
     author = SlugRelatedField(slug_field='username', read_only=True)
 
     class Meta:
@@ -0,0 +1,82 @@
+import json
+import logging
+import time
+import traceback
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger('api.slow_queries')
+STACK_DEPTH = 10
+
+
+def get_stack():
+    """Кадры стека вызовов кода проекта без библиотек"""
+    return [
+        f'{frame.filename}:{frame.lineno} in {frame.name}'
+        for frame in traceback.extract_stack()[:-3]
+        if frame.filename.startswith(settings.BASE_DIR)
+        and 'site-packages' not in frame.filename
+    ][-STACK_DEPTH:]
+
+
+def explain(sql, params):
+    """План выполнения запроса, полученный в обход обёрток соединения"""
+    prefix = (
+        'EXPLAIN QUERY PLAN' if connection.vendor == 'sqlite' else 'EXPLAIN'
+    )
+    try:
+        with connection.cursor() as cursor:
+            cursor.cursor.execute(f'{prefix} {sql}', params)
+            return [' '.join(map(str, row)) for row in cursor.cursor]
+    except Exception as error:
+        return [f'EXPLAIN failed: {error!r}']
+
+
+class SlowQueryRecorder:
+    """Запись в журнал запросов дольше `SLOW_QUERY_LOG['THRESHOLD_MS']`"""
+
+    def __init__(self, request):
+        self.request = request
+        self.threshold = settings.SLOW_QUERY_LOG['THRESHOLD_MS'] / 1000
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = time.perf_counter() - start
+        if duration >= self.threshold:
+            self.log(sql, params, many, duration)
+        return result
+
+    def log(self, sql, params, many, duration):
+        match = self.request.resolver_match
+        is_select = not many and sql.lstrip().upper().startswith('SELECT')
+        logger.warning(json.dumps({
+            'time': timezone.now().isoformat(),
+            'duration_ms': round(duration * 1000, 3),
+            'sql': sql,
+            # значения могут содержать коды подтверждения и хэши паролей
+            'params': (
+                params if settings.SLOW_QUERY_LOG['LOG_PARAMS'] else None
+            ),
+            'method': self.request.method,
+            'path': self.request.path,
+            'view': match.view_name if match else None,
+            'stack': get_stack(),
+            'plan': explain(sql, params) if is_select else [],
+        }, ensure_ascii=False, default=str))
+
+
+class SlowQueryLogMiddleware:
+    """Журнал медленных запросов к базе с планом выполнения и стеком"""
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_LOG['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with connection.execute_wrapper(SlowQueryRecorder(request)):
+            return self.get_response(request)
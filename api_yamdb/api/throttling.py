@@ -0,0 +1,118 @@
+import time
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+from reviews.search import normalize_search
+
+THROTTLE_KEY = 'throttle:{}:{}:{}'
+
+
+def refill(state, capacity, rate, now):
+    """Количество токенов в корзине на момент `now`"""
+    if state is None:
+        return capacity
+    tokens, updated = state[:2]
+    return min(capacity, tokens + (now - updated) * rate)
+
+
+class LocalBuckets:
+    """
+    Корзины токенов в памяти процесса. Обходятся без блокировки: чтение и
+    запись кортежа в словарь атомарны, а гонка параллельных запросов
+    может лишь пропустить единичный лишний запрос. Корзина хранит свои
+    ёмкость и скорость пополнения: в словаре лежат корзины разных видов.
+    """
+
+    def __init__(self):
+        self.buckets = {}
+
+    def consume(self, key, capacity, rate, now):
+        tokens = refill(self.buckets.get(key), capacity, rate, now)
+        if tokens < 1:
+            return (1 - tokens) / rate
+        if len(self.buckets) >= settings.AUTH_THROTTLE['MAX_SIZE']:
+            self.prune(now)
+        self.buckets[key] = (tokens - 1, now, capacity, rate)
+        return 0
+
+    def prune(self, now):
+        """Удаление полных корзин, а если их нет - всех"""
+        full = [
+            key for key, state in list(self.buckets.items())
+            if refill(state, state[2], state[3], now) >= state[2]
+        ]
+        for key in full:
+            self.buckets.pop(key, None)
+        if not full:
+            self.buckets.clear()
+
+    def clear(self):
+        self.buckets.clear()
+
+
+class CacheBuckets:
+    """Корзины токенов в общем для процессов кэше"""
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def consume(self, key, capacity, rate, now):
+        tokens = refill(self.cache.get(key), capacity, rate, now)
+        if tokens < 1:
+            return (1 - tokens) / rate
+        self.cache.set(key, (tokens - 1, now), capacity / rate)
+        return 0
+
+
+local_buckets = LocalBuckets()
+
+
+def get_buckets():
+    alias = settings.AUTH_THROTTLE['CACHE_ALIAS']
+    return local_buckets if alias is None else CacheBuckets(alias)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Ограничение частоты запросов по IP-адресу и username корзинами
+    токенов. Проверка выполняется до обращения view к базе.
+    """
+    scope = None
+    wait_time = None
+
+    def get_keys(self, request):
+        keys = [('ip', self.get_ident(request))]
+        # тело запроса может быть JSON-массивом или строкой
+        data = request.data if isinstance(request.data, Mapping) else {}
+        username = data.get('username')
+        if isinstance(username, str) and username:
+            keys.append(('username', normalize_search(username)))
+        return keys
+
+    def allow_request(self, request, view):
+        options = settings.AUTH_THROTTLE
+        buckets = get_buckets()
+        now = time.time()
+        for kind, value in self.get_keys(request):
+            capacity, period = options['RATES'][kind]
+            self.wait_time = buckets.consume(
+                THROTTLE_KEY.format(self.scope, kind, value),
+                capacity, capacity / period, now
+            )
+            if self.wait_time:
+                return False
+        return True
+
+    def wait(self):
+        return self.wait_time
+
+
+class SignUpThrottle(TokenBucketThrottle):
+    scope = 'signup'
+
+
+class TokenThrottle(TokenBucketThrottle):
+    scope = 'token'
@@ -2,7 +2,7 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (
-    CategoryViewSet, CommentViewSet, GenreViewSet, ReviewViewSet,
+    CategoryViewSet, CommentViewSet, GenreViewSet, metrics, ReviewViewSet,
     signup, TitleViewSet, token, UserViewSet
 )
 
@@ -22,5 +22,6 @@ router_v1.register(
 urlpatterns = [
     path('v1/auth/signup/', signup),
     path('v1/auth/token/', token),
+    path('v1/metrics/', metrics),
     path('v1/', include(router_v1.urls)),
 ]
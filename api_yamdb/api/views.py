@@ -1,16 +1,20 @@
-from django.core.mail import send_mail
-from django.db.models import Avg, IntegerField
-from django.db.models.functions import Cast, Round
+from django.db import transaction
+from django.http import HttpResponse
 from django.db.utils import IntegrityError
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, status, viewsets
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import (
+    action, api_view, permission_classes, throttle_classes
+)
 from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
-from .filters import TitleFilter
+from .cache import AnonymousListCacheMixin, ConditionalGetMixin
+from .filters import NormalizedSearchFilter, TitleFilter, TitleOrderingFilter
+from .metrics import PROMETHEUS_CONTENT_TYPE, render_metrics
+from .pagination import ReviewCommentPagination, TitlePagination
 from .permissions import (
     IsAdmin, IsAdminOrReadOnly, IsAdminOrIsModeratorOrIsAuthorOrReadOnly
 )
@@ -19,8 +23,14 @@ from .serializers import (
     ReviewSerializer, SignUpSerializer, TitleGetSerializer, TitleSerializer,
     TokenSerializer, UserSerializer
 )
-from reviews.models import Review, Title, Category, Genre, User
-from reviews.utils import get_tokens_for_user
+from .throttling import SignUpThrottle, TokenThrottle
+from reviews.cache import COMMENTS_VERSION, REVIEWS_VERSION
+from reviews.models import Comment, Review, Title, Category, Genre, User
+from reviews.outbox import queue_email
+from reviews.utils import (
+    create_confirmation_code, get_cached_user, get_tokens_for_user,
+    use_confirmation_code
+)
 
 UNIQUE_ERROR = 'Пользователь с таким {} уже есть.'
 
@@ -30,14 +40,18 @@ class UserViewSet(viewsets.ModelViewSet):
     serializer_class = UserSerializer
     lookup_field = 'username'
     permission_classes = (IsAdmin,)
-    filter_backends = (filters.SearchFilter, filters.OrderingFilter)
-    search_fields = ('username',)
+    filter_backends = (NormalizedSearchFilter, filters.OrderingFilter)
+    search_fields = ('username_normalized',)
     ordering = ['username']
 
     @action(methods=['GET', 'PATCH'], detail=False,
             permission_classes=(IsAuthenticated,))
     def me(self, request):
-        serializer = MeSerializer(instance=request.user)
+        user = request.user
+        if not isinstance(user, User):
+            # при чтении пользователь восстановлен из токена
+            user = get_cached_user(user.pk)
+        serializer = MeSerializer(instance=user)
         if request.method == 'PATCH':
             serializer.partial = True
             serializer.initial_data = request.data
@@ -48,16 +62,23 @@ class UserViewSet(viewsets.ModelViewSet):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([SignUpThrottle])
 def signup(request):
-    confirmation_code = User.objects.make_random_password()
     serializer = SignUpSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
     try:
-        user, _ = User.objects.update_or_create(
-            username=serializer.validated_data['username'],
-            email=serializer.validated_data['email'],
-            defaults={'confirmation_code': confirmation_code}
-        )
+        with transaction.atomic():
+            user, _ = User.objects.get_or_create(
+                username=serializer.validated_data['username'],
+                email=serializer.validated_data['email'],
+            )
+            confirmation_code = create_confirmation_code(user)
+            # письмо отправляет команда send_emails
+            queue_email(
+                'confirmation code',
+                f'"confirmation_code": "{confirmation_code}"',
+                serializer.validated_data['email']
+            )
     except IntegrityError as ex:
         fail, field = ex.args and ex.args[0].split(': ')
         if fail != 'UNIQUE constraint failed':
@@ -66,38 +87,44 @@ def signup(request):
             {'detail': UNIQUE_ERROR.format(field.split('.')[1])},
             status=status.HTTP_400_BAD_REQUEST
         )
-    send_mail(
-        'confirmation code',
-        f'"confirmation_code": "{confirmation_code}"',
-        None,  # DEFAULT_FROM_EMAIL добавлен в settings
-        [serializer.validated_data["email"]]
-    )
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([TokenThrottle])
 def token(request):
     serializer = TokenSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
     user = get_object_or_404(
         User,
         username=serializer.validated_data['username'])
-    if (not serializer.validated_data['confirmation_code']
-            == user.confirmation_code):
+    if not use_confirmation_code(
+            user, serializer.validated_data['confirmation_code']
+    ):
         raise ValidationError({'detail': 'Неверный код подтверждения.'})
 
     return Response({'token': str(get_tokens_for_user(user))})
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(rating=Cast(
-        Round(Avg('reviews__score')), IntegerField()
-    ))
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def metrics(request):
+    return HttpResponse(render_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+class TitleViewSet(ConditionalGetMixin, AnonymousListCacheMixin,
+                   viewsets.ModelViewSet):
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre')
     permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = (DjangoFilterBackend, filters.OrderingFilter)
+    pagination_class = TitlePagination
+    filter_backends = (DjangoFilterBackend, TitleOrderingFilter)
     filterset_class = TitleFilter
+    ordering_fields = ('id', 'name', 'year', 'rating')
     ordering = ['name']
+    cache_versions = ('title', 'category', 'genre')
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
@@ -120,51 +147,90 @@ class TitleViewSet(viewsets.ModelViewSet):
         return super().get_serializer(*args, **kwargs)
 
 
-class CategoryGenreBase(mixins.CreateModelMixin, mixins.DestroyModelMixin,
-                        mixins.ListModelMixin, viewsets.GenericViewSet):
+class CategoryGenreBase(AnonymousListCacheMixin, mixins.CreateModelMixin,
+                        mixins.DestroyModelMixin, mixins.ListModelMixin,
+                        viewsets.GenericViewSet):
     permission_classes = (IsAdminOrReadOnly,)
     lookup_field = 'slug'
-    filter_backends = (filters.SearchFilter,)
-    search_fields = ('name',)
+    filter_backends = (NormalizedSearchFilter,)
+    search_fields = ('name_normalized',)
 
 
 class CategoryViewSet(CategoryGenreBase):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_versions = ('category',)
 
 
 class GenreViewSet(CategoryGenreBase):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_versions = ('genre',)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = (IsAdminOrIsModeratorOrIsAuthorOrReadOnly,)
+    pagination_class = ReviewCommentPagination
+
+    def get_cache_versions(self):
+        return (REVIEWS_VERSION.format(self.kwargs.get('title_id')),)
 
     def get_title(self):
-        return get_object_or_404(Title, id=self.kwargs.get('title_id'))
+        """Произведение из URL, запрашивается один раз за запрос"""
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title, id=self.kwargs.get('title_id')
+            )
+        return self._title
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        if self.detail:
+            # отсутствие произведения даст 404 при поиске отзыва
+            reviews = Review.objects.filter(
+                title_id=self.kwargs.get('title_id')
+            )
+        else:
+            reviews = self.get_title().reviews.all()
+        return reviews.select_related('author').only(
+            'id', 'title', 'text', 'score', 'pub_date',
+            'author', 'author__username'
+        )
 
     def perform_create(self, serializer):
         serializer.save(title=self.get_title(), author=self.request.user)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = (IsAdminOrIsModeratorOrIsAuthorOrReadOnly,)
+    pagination_class = ReviewCommentPagination
+
+    def get_cache_versions(self):
+        return (COMMENTS_VERSION.format(self.kwargs.get('review_id')),)
 
     def get_review(self):
-        return get_object_or_404(
-            Review,
-            id=self.kwargs.get('review_id'),
-            title__id=self.kwargs.get('title_id')
-        )
+        """Отзыв из URL, запрашивается один раз за запрос"""
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review,
+                id=self.kwargs.get('review_id'),
+                title__id=self.kwargs.get('title_id')
+            )
+        return self._review
 
     def get_queryset(self):
-        return self.get_review().comments.all()
+        if self.detail:
+            # отсутствие отзыва даст 404 при поиске комментария
+            comments = Comment.objects.filter(
+                review_id=self.kwargs.get('review_id'),
+                review__title_id=self.kwargs.get('title_id')
+            )
+        else:
+            comments = self.get_review().comments.all()
+        return comments.select_related('author').only(
+            'id', 'review', 'text', 'pub_date', 'author', 'author__username'
+        )
 
     def perform_create(self, serializer):
         serializer.save(review=self.get_review(), author=self.request.user)
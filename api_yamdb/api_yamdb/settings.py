@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 from dotenv import load_dotenv
 
@@ -33,6 +34,8 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'reviews.CustomUser'
 
 MIDDLEWARE = [
+    'api.metrics.RequestMetricsMiddleware',
+    'api.slow_queries.SlowQueryLogMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -113,24 +116,133 @@ TEST_DATA_DIR = os.path.join(BASE_DIR, 'static/data/')
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'api.permissions.IsAdmin',
     ],
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.metrics.MeasuredJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    # IP-адрес клиента для ограничения частоты запросов берётся из
+    # REMOTE_ADDR; за N обратными прокси указать N, чтобы использовать
+    # адрес, добавленный ими в X-Forwarded-For
+    'NUM_PROXIES': 0,
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Общий для нескольких процессов кэш ответов:
+    # 'default': {
+    #     'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    #     'LOCATION': os.path.join(BASE_DIR, 'cache'),
+    # },
+    # Отметки изменения пользователей (USER_CHANGES): кэш должен быть общим
+    # для всех процессов и не вытеснять записи до истечения их срока,
+    # иначе устаревшая роль из выданного токена снова станет действительной
+    'user_changes': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(
+            tempfile.gettempdir(), 'api_yamdb_user_changes'
+        ),
+        'OPTIONS': {'MAX_ENTRIES': 10 ** 9},
+    },
+}
+
+RESPONSE_CACHE = {
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 60 * 5,
 }
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 DEFAULT_FROM_EMAIL = 'api_yamdb@example.ru'
+# Очередь писем, отправляемых командой send_emails
+EMAIL_OUTBOX = {
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 5,
+    # задержка перед повтором в секундах, удваивается с каждой попыткой
+    'RETRY_DELAY': 60,
+    'POLL_INTERVAL': 5,
+    # время в секундах, на которое обработчик захватывает пачку писем;
+    # письма прерванного обработчика отправляются повторно после него
+    'CLAIM_TIMEOUT': 60 * 5,
+}
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
+# Гистограммы запросов для /api/v1/metrics/
+METRICS = {
+    'ENABLED': True,
+}
+# Журнал запросов к базе дольше THRESHOLD_MS миллисекунд
+SLOW_QUERY_LOG = {
+    'ENABLED': True,
+    'THRESHOLD_MS': 200,
+    'FILENAME': os.path.join(BASE_DIR, 'slow_queries.log'),
+    # запись значений параметров запросов, включая персональные данные
+    'LOG_PARAMS': False,
+}
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG['FILENAME'],
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'encoding': 'utf-8',
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'api.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+# Кэш пользователей процесса для запросов на изменение
+USER_CACHE = {
+    'TIMEOUT': 30,
+    'MAX_SIZE': 10000,
+}
+# LRU-кэш процесса проверенных токенов, 0 - отключён
+TOKEN_CACHE = {
+    'MAX_SIZE': 10000,
+}
+# Отметки изменения пользователей, после которых данные в выданных ранее
+# токенах не используются; требования к кэшу - см. CACHES['user_changes']
+USER_CHANGES = {
+    'CACHE_ALIAS': 'user_changes',
+}
+# Ограничение частоты запросов к signup и token
+AUTH_THROTTLE = {
+    # None - корзины в памяти процесса, иначе алиас общего кэша из CACHES
+    'CACHE_ALIAS': None,
+    # ёмкость корзины и время её полного пополнения в секундах
+    'RATES': {
+        'ip': (60, 60),
+        'username': (5, 60),
+    },
+    'MAX_SIZE': 100000,
+}
 LENGTH_CONFORMATION_CODE = 8
+# Срок действия кода подтверждения в секундах
+CONFIRMATION_CODE_TIMEOUT = 60 * 60
 
 REVIEWS = {
     'MIN_SCORE': 1,
@@ -1,22 +1,23 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
-from .models import Category, Comment, Genre, Review, Title, User
+from .models import (
+    Category, Comment, Genre, OutboxEmail, Review, Title, User
+)
 
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
     """Расширение модели админа"""
     model = User
-    list_display = ['email', 'username', 'confirmation_code',
+    list_display = ['email', 'username',
                     'first_name', 'last_name',
                     'bio', 'role']
-    list_editable = ['confirmation_code']
 
 
 @admin.register(Title)
 class TitlesAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'name', 'year', 'category')
+    list_display = ('pk', 'name', 'year', 'category', 'rating')
     list_editable = ('name', 'year',)
     search_fields = ('name',)
     list_filter = ('category',)
@@ -39,3 +40,9 @@ class GenreAdmin(admin.ModelAdmin):
 # Регистрируем расширенные модели пользователей и админа
 admin.site.register(Review)
 admin.site.register(Comment)
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'recipient', 'subject', 'created', 'attempts',
+                    'next_attempt')
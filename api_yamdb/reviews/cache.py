@@ -0,0 +1,89 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Category, Comment, Genre, GenreTitle, Review, Title, User
+
+VERSION_KEY = 'version:{}'
+REVIEWS_VERSION = 'reviews.{}'
+COMMENTS_VERSION = 'comments.{}'
+
+
+def user_versions(user):
+    """
+    Версии списков отзывов и комментариев, в которых показывается имя
+    пользователя. Меняются только при смене имени.
+    """
+    if not user.username_changed():
+        return ()
+    title_ids = Review.objects.filter(author=user).order_by().values_list(
+        'title_id', flat=True
+    ).distinct()
+    review_ids = Comment.objects.filter(author=user).order_by().values_list(
+        'review_id', flat=True
+    ).distinct()
+    return (
+        *(REVIEWS_VERSION.format(title_id) for title_id in title_ids),
+        *(COMMENTS_VERSION.format(review_id) for review_id in review_ids),
+    )
+
+
+# Версии кэша ответов, которые меняются при записи экземпляра модели
+CACHE_VERSIONS = {
+    Category: lambda category: ('category',),
+    Comment: lambda comment: (COMMENTS_VERSION.format(comment.review_id),),
+    Genre: lambda genre: ('genre',),
+    GenreTitle: lambda genre_title: ('title',),
+    Review: lambda review: (
+        'title',
+        REVIEWS_VERSION.format(review.title_id),
+        COMMENTS_VERSION.format(review.pk),
+    ),
+    Title: lambda title: ('title', REVIEWS_VERSION.format(title.pk)),
+    User: user_versions,
+}
+# Версии, не привязанные к конкретным объектам
+GLOBAL_VERSIONS = ('category', 'genre', 'title')
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE['CACHE_ALIAS']]
+
+
+def new_version():
+    """Уникальное значение версии, не совпадающее с вытесненными из кэша"""
+    return time.time_ns()
+
+
+def get_versions(*names):
+    """Текущие версии данных моделей, отсутствующие создаются"""
+    cache = get_cache()
+    keys = [VERSION_KEY.format(name) for name in names]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, new_version())
+            versions[key] = cache.get(key)
+    return tuple(versions[key] for key in keys)
+
+
+def bump_versions(*names):
+    """Смена версий данных моделей после фиксации транзакции"""
+    def bump():
+        get_cache().set_many(
+            {VERSION_KEY.format(name): new_version() for name in names},
+            None
+        )
+    transaction.on_commit(bump)
+
+
+def bump_instance_versions(*objs):
+    """Смена версий кэша ответов, зависящих от экземпляров моделей"""
+    names = set()
+    for obj in objs:
+        if type(obj) in CACHE_VERSIONS:
+            names.update(CACHE_VERSIONS[type(obj)](obj))
+    if names:
+        bump_versions(*names)
@@ -0,0 +1,306 @@
+import json
+import random
+import subprocess
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max, Min
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from reviews.models import Category, Genre, Review, Title, User
+from reviews.utils import create_confirmation_code, get_tokens_for_user
+
+DEFAULT_MIX = 'browse=40,filter=25,comments=20,review=10,token=5'
+BENCHMARK_USERNAME = 'benchmark_user_{}'
+PERCENTILES = (50, 95, 99)
+# Сценарий browse просматривает первые страницы списка произведений
+BROWSE_PAGES = 5
+# Сколько идентификаторов отзывов загружается для сценария comments
+REVIEW_SAMPLE_SIZE = 1000
+
+
+def parse_mix(value):
+    """Разбор смеси сценариев вида `browse=40,review=10`"""
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        if name not in Scenarios.names:
+            raise CommandError(f'Неизвестный сценарий {name}.')
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise CommandError(f'Неверный вес сценария {name}: {weight}.')
+    return mix
+
+
+def percentile(values, rank):
+    """Перцентиль по методу ближайшего ранга для отсортированного списка"""
+    if not values:
+        return None
+    index = max(0, -(-len(values) * rank // 100) - 1)
+    return values[index]
+
+
+def summarize(latencies, queries, errors, elapsed):
+    latencies = sorted(latencies)
+    summary = {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': (round(len(latencies) / elapsed, 1)
+                           if elapsed else None),
+        'mean_ms': (round(sum(latencies) / len(latencies) * 1000, 3)
+                    if latencies else None),
+        'queries_per_request': (round(sum(queries) / len(queries), 2)
+                                if queries else None),
+    }
+    for rank in PERCENTILES:
+        value = percentile(latencies, rank)
+        summary[f'p{rank}_ms'] = (
+            None if value is None else round(value * 1000, 3)
+        )
+    return summary
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'), capture_output=True,
+            text=True, cwd=settings.BASE_DIR, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Scenarios:
+    """
+    Сценарии нагрузки. Каждый подготавливает данные и возвращает функцию,
+    выполняющую один запрос к API через тестовый клиент: измеряется
+    только она.
+    """
+    names = ('browse', 'filter', 'comments', 'review', 'token')
+
+    def __init__(self, rng, users):
+        self.rng = rng
+        self.client = Client()
+        self.users = users
+        self.clients = [
+            Client(HTTP_AUTHORIZATION=f'Bearer {get_tokens_for_user(user)}')
+            for user in users
+        ]
+        self.title_ids = list(Title.objects.values_list('pk', flat=True))
+        if not self.title_ids:
+            raise CommandError(
+                'В базе нет произведений, выполните generate_dataset.'
+            )
+        self.reviews = self.sample_reviews()
+        self.genres = list(Genre.objects.values_list('slug', flat=True))
+        self.categories = list(
+            Category.objects.values_list('slug', flat=True)
+        )
+        self.words = list(
+            Title.objects.values_list('name', flat=True)[:100]
+        )
+        # пары пользователь-произведение без отзыва для сценария review
+        self.review_pairs = (
+            (client, title_id)
+            for title_id in self.rng.sample(
+                self.title_ids, len(self.title_ids)
+            )
+            for client in self.clients
+        )
+
+    def sample_reviews(self):
+        """Случайные отзывы, одинаковые при одинаковом seed"""
+        bounds = Review.objects.aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['low'] is None:
+            return []
+        ids = range(bounds['low'], bounds['high'] + 1)
+        return list(Review.objects.filter(pk__in=self.rng.sample(
+            ids, min(len(ids), REVIEW_SAMPLE_SIZE)
+        )).order_by('pk').values_list('pk', 'title_id'))
+
+    def browse(self):
+        if self.rng.random() < 0.5:
+            pages = -(-len(self.title_ids) // settings.REST_FRAMEWORK[
+                'PAGE_SIZE'
+            ])
+            page = self.rng.randint(1, min(pages, BROWSE_PAGES))
+            url = f'/api/v1/titles/?page={page}'
+        else:
+            url = f'/api/v1/titles/{self.rng.choice(self.title_ids)}/'
+        return lambda: self.client.get(url)
+
+    def filter(self):
+        params = {'ordering': self.rng.choice(('-rating', 'name', '-year'))}
+        if self.genres:
+            params['genre'] = self.rng.choice(self.genres)
+        if self.categories and self.rng.random() < 0.5:
+            params['category'] = self.rng.choice(self.categories)
+        if self.rng.random() < 0.3:
+            params['rating_min'] = self.rng.randint(1, 9)
+        if self.words and self.rng.random() < 0.3:
+            params = {'search': self.rng.choice(self.words).split()[0]}
+        return lambda: self.client.get('/api/v1/titles/', params)
+
+    def comments(self):
+        if not self.reviews:
+            return self.browse()
+        review_id, title_id = self.rng.choice(self.reviews)
+        return lambda: self.client.get(
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+        )
+
+    def review(self):
+        client, title_id = next(self.review_pairs)
+        data = {
+            'text': 'Отзыв нагрузочного теста',
+            'score': self.rng.randint(1, 10),
+        }
+        return lambda: client.post(
+            f'/api/v1/titles/{title_id}/reviews/', data,
+            content_type='application/json'
+        )
+
+    def token(self):
+        user = self.rng.choice(self.users)
+        data = {
+            'username': user.username,
+            'confirmation_code': create_confirmation_code(user),
+        }
+        return lambda: self.client.post(
+            '/api/v1/auth/token/', data, content_type='application/json'
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест API через тестовый клиент Django: задержки, '
+        'пропускная способность и запросы к базе по сценариям'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000,
+                            help='Количество измеряемых запросов')
+        parser.add_argument('--warmup', type=int, default=100,
+                            help='Количество запросов для прогрева')
+        parser.add_argument('--mix', default=DEFAULT_MIX,
+                            help='Веса сценариев: browse, filter, '
+                                 'comments, review, token')
+        parser.add_argument('--users', type=int, default=20,
+                            help='Количество пользователей теста')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Начальное значение генератора')
+        parser.add_argument('--output',
+                            help='Файл для результатов в формате JSON, '
+                                 'по умолчанию вывод в консоль')
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options['mix'])
+        rng = random.Random(options['seed'])
+        users = self.create_users(options['users'])
+        # ограничение частоты запросов не должно влиять на результат
+        throttle = {**settings.AUTH_THROTTLE, 'RATES': {
+            kind: (10 ** 9, 1) for kind in settings.AUTH_THROTTLE['RATES']
+        }}
+        try:
+            with override_settings(AUTH_THROTTLE=throttle):
+                scenarios = Scenarios(rng, users)
+                names = list(mix)
+                weights = [mix[name] for name in names]
+                plan = rng.choices(
+                    names, weights=weights,
+                    k=options['warmup'] + options['requests']
+                )
+                reviews = plan.count('review')
+                if reviews > len(users) * len(scenarios.title_ids):
+                    raise CommandError(
+                        f'Для {reviews} запросов review не хватает пар '
+                        'пользователь-произведение, увеличьте --users.'
+                    )
+                for name in plan[:options['warmup']]:
+                    getattr(scenarios, name)()()
+                result = self.run(scenarios, plan[options['warmup']:])
+        finally:
+            # отзывы тестовых пользователей удаляются вместе с ними
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+        result.update({
+            'commit': get_commit(),
+            'date': timezone.now().isoformat(),
+            'options': {
+                key: options[key]
+                for key in ('requests', 'warmup', 'users', 'seed')
+            },
+            'mix': mix,
+            'database': {
+                'vendor': connection.vendor,
+                'titles': len(scenarios.title_ids),
+            },
+        })
+        output = json.dumps(result, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output)
+            self.stdout.write(f'Результаты записаны в {options["output"]}')
+        else:
+            self.stdout.write(output)
+
+    def create_users(self, count):
+        users = [
+            User(username=BENCHMARK_USERNAME.format(number),
+                 email=f'{BENCHMARK_USERNAME.format(number)}@yamdb.fake')
+            for number in range(count)
+        ]
+        User.objects.filter(
+            username__in=[user.username for user in users]
+        ).delete()
+        for user in users:
+            user.normalize_fields()
+        User.objects.bulk_create(users)
+        return list(User.objects.filter(
+            username__in=[user.username for user in users]
+        ))
+
+    def run(self, scenarios, plan):
+        latencies = defaultdict(list)
+        queries = defaultdict(list)
+        errors = defaultdict(int)
+        counter = {'queries': 0}
+
+        def count_queries(execute, sql, params, many, context):
+            counter['queries'] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_queries):
+            for name in plan:
+                request = getattr(scenarios, name)()
+                counter['queries'] = 0
+                start = time.perf_counter()
+                response = request()
+                latencies[name].append(time.perf_counter() - start)
+                queries[name].append(counter['queries'])
+                if response.status_code >= 400:
+                    errors[name] += 1
+        # пропускная способность считается по времени самих запросов, без
+        # подготовки сценариев
+        total_latencies = [
+            value for name in latencies for value in latencies[name]
+        ]
+        return {
+            'total': summarize(
+                total_latencies,
+                [value for name in queries for value in queries[name]],
+                sum(errors.values()), sum(total_latencies)
+            ),
+            'scenarios': {
+                name: summarize(
+                    latencies[name], queries[name], errors[name],
+                    sum(latencies[name])
+                )
+                for name in latencies
+            },
+        }
@@ -0,0 +1,302 @@
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+
+from reviews.cache import bump_versions, GLOBAL_VERSIONS
+from reviews.models import (
+    Category, Comment, Genre, GenreTitle, Review, Title, User
+)
+from reviews.search import normalize_search, rebuild_title_index
+
+WORDS = (
+    'тёмный', 'последний', 'город', 'ночь', 'дорога', 'война', 'любовь',
+    'море', 'тайна', 'время', 'сердце', 'зима', 'огонь', 'песня', 'звезда',
+    'дом', 'небо', 'остров', 'путь', 'тень', 'свет', 'сон', 'ветер', 'река',
+    'старый', 'новый', 'долгий', 'тихий', 'красный', 'белый', 'сильный',
+    'сюжет', 'герой', 'финал', 'актёр', 'музыка', 'стиль', 'идея', 'книга',
+    'фильм', 'альбом', 'история', 'роль', 'ритм', 'глава', 'сцена', 'образ',
+)
+FIRST_DATE = datetime(2015, 1, 1, tzinfo=timezone.utc)
+# Кэш страниц SQLite на время генерации, КиБ: вставка в индексы со
+# случайным порядком ключей не упирается в чтение страниц с диска
+SQLITE_CACHE_SIZE = 512 * 1024
+DATE_RANGE = int(timedelta(days=365 * 8).total_seconds())
+# Тексты отзывов и комментариев выбираются из заранее собранного набора
+TEXT_POOL_BITS = 12
+MIN_YEAR = 1900
+MAX_YEAR = 2021
+
+
+def zipf_weights(count, skew):
+    """Веса популярности по закону Ципфа: первые объекты самые популярные"""
+    return [1 / (rank ** skew) for rank in range(1, count + 1)]
+
+
+def distribute(total, weights, limit):
+    """
+    Распределение `total` по объектам пропорционально весам, не более
+    `limit` на объект. Остаток от округления добавляется по кругу.
+    """
+    weight_sum = sum(weights)
+    counts = [min(limit, int(total * weight / weight_sum))
+              for weight in weights]
+    remainder = total - sum(counts)
+    while remainder:
+        for index, count in enumerate(counts):
+            if remainder and count < limit:
+                counts[index] += 1
+                remainder -= 1
+    return counts
+
+
+def first_id(model):
+    return (model.objects.aggregate(max_id=Max('pk'))['max_id'] or 0) + 1
+
+
+def bulk_insert(model, fields, rows, batch_size):
+    """
+    Запись строк `rows` (кортежи значений полей `fields`, готовые для базы)
+    пачками через executemany, минуя создание экземпляров моделей.
+    """
+    columns = [model._meta.get_field(field).column for field in fields]
+    sql = (
+        f'INSERT INTO {connection.ops.quote_name(model._meta.db_table)} '
+        f'({", ".join(map(connection.ops.quote_name, columns))}) '
+        f'VALUES ({", ".join(["%s"] * len(columns))})'
+    )
+    count = 0
+    batch = []
+    with connection.cursor() as cursor:
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                cursor.executemany(sql, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+            count += len(batch)
+    return count
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерация синтетических данных для нагрузочного тестирования: '
+        'пользователи, категории, жанры, произведения, отзывы, комментарии'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reviews', type=int, default=10000,
+                            help='Количество отзывов')
+        parser.add_argument('--users', type=int,
+                            help='Количество пользователей, '
+                                 'по умолчанию 1/20 от отзывов')
+        parser.add_argument('--titles', type=int,
+                            help='Количество произведений, '
+                                 'по умолчанию 1/50 от отзывов')
+        parser.add_argument('--comments', type=int,
+                            help='Количество комментариев, '
+                                 'по умолчанию половина от отзывов')
+        parser.add_argument('--categories', type=int, default=20,
+                            help='Количество категорий')
+        parser.add_argument('--genres', type=int, default=50,
+                            help='Количество жанров')
+        parser.add_argument('--skew', type=float, default=1.0,
+                            help='Показатель распределения Ципфа '
+                                 'популярности произведений и отзывов')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Начальное значение генератора')
+        parser.add_argument('--batch_size', type=int, default=10000,
+                            help='Количество строк в одном INSERT')
+
+    def handle(self, *args, **options):
+        reviews = options['reviews']
+        users = options['users'] or max(1, reviews // 20)
+        titles = options['titles'] or max(1, reviews // 50)
+        comments = options['comments']
+        if comments is None:
+            comments = reviews // 2
+        if reviews > users * titles:
+            raise CommandError(
+                'Отзывов больше, чем пар пользователь-произведение.'
+            )
+        if comments and not reviews:
+            raise CommandError('Комментарии невозможны без отзывов.')
+        self.rng = random.Random(options['seed'])
+        self.skew = options['skew']
+        self.batch_size = options['batch_size']
+        self.sqlite = connection.vendor == 'sqlite'
+        self.texts = [
+            self.words(3, 20) for _ in range(2 ** TEXT_POOL_BITS)
+        ]
+        self.started = time.monotonic()
+        if self.sqlite:
+            with connection.cursor() as cursor:
+                cursor.execute(f'PRAGMA cache_size = -{SQLITE_CACHE_SIZE}')
+        with transaction.atomic():
+            user_ids = self.create_users(users)
+            category_ids = self.create_categories(
+                Category, options['categories']
+            )
+            genre_ids = self.create_categories(Genre, options['genres'])
+            title_ids = self.create_titles(titles, category_ids, genre_ids)
+            review_ids = self.create_reviews(reviews, title_ids, user_ids)
+            self.create_comments(comments, review_ids, user_ids)
+            count = Title.objects.filter(
+                pk__gte=title_ids[0]
+            ).recalculate_rating()
+            self.report('Пересчитаны рейтинги произведений', count)
+            rebuild_title_index()
+            self.report('Перестроен поисковый индекс', titles)
+        bump_versions(*GLOBAL_VERSIONS)
+
+    def report(self, message, count):
+        self.stdout.write(
+            f'{message}: {count} '
+            f'({time.monotonic() - self.started:.1f} с)'
+        )
+
+    def words(self, low, high):
+        return ' '.join(self.rng.choices(WORDS, k=self.rng.randint(low, high)))
+
+    def text(self):
+        return self.texts[self.rng.getrandbits(TEXT_POOL_BITS)]
+
+    def random_date(self):
+        return self.adapt_date(int(self.rng.random() * DATE_RANGE))
+
+    def adapt_date(self, seconds):
+        if self.sqlite:
+            # то же, что adapt_datetimefield_value, в несколько раз быстрее
+            return str(
+                FIRST_DATE.replace(tzinfo=None) + timedelta(seconds=seconds)
+            )
+        return connection.ops.adapt_datetimefield_value(
+            FIRST_DATE + timedelta(seconds=seconds)
+        )
+
+    def create_users(self, count):
+        start = first_id(User)
+        date_joined = self.adapt_date(0)
+        rows = (
+            (pk, f'user{pk}', f'user{pk}', f'user{pk}@yamdb.fake',
+             UNUSABLE_PASSWORD_PREFIX, date_joined, False, False, True,
+             '', '', 'user', '')
+            for pk in range(start, start + count)
+        )
+        self.report('Созданы пользователи', bulk_insert(
+            User,
+            ('id', 'username', 'username_normalized', 'email', 'password',
+             'date_joined', 'is_superuser', 'is_staff', 'is_active',
+             'first_name', 'last_name', 'role', 'bio'),
+            rows, self.batch_size
+        ))
+        return range(start, start + count)
+
+    def create_categories(self, model, count):
+        start = first_id(model)
+        name = model._meta.verbose_name.capitalize()
+        rows = (
+            (pk, f'{name} {pk}', normalize_search(f'{name} {pk}'),
+             f'{model._meta.model_name}-{pk}')
+            for pk in range(start, start + count)
+        )
+        self.report(f'Созданы {model._meta.verbose_name_plural}', bulk_insert(
+            model, ('id', 'name', 'name_normalized', 'slug'),
+            rows, self.batch_size
+        ))
+        return range(start, start + count)
+
+    def create_titles(self, count, category_ids, genre_ids):
+        start = first_id(Title)
+        title_ids = range(start, start + count)
+        category_weights = list(accumulate(
+            zipf_weights(len(category_ids), self.skew)
+        ))
+        rows = []
+        for pk in title_ids:
+            name = f'{self.words(1, 4).capitalize()} {pk}'
+            category = self.rng.choices(
+                category_ids, cum_weights=category_weights
+            )[0] if category_ids else None
+            rows.append((
+                pk, name, normalize_search(name),
+                self.rng.randint(MIN_YEAR, MAX_YEAR), self.words(5, 30),
+                category, 0, 0
+            ))
+        self.report('Созданы произведения', bulk_insert(
+            Title,
+            ('id', 'name', 'name_normalized', 'year', 'description',
+             'category', 'score_sum', 'score_count'),
+            rows, self.batch_size
+        ))
+        if genre_ids:
+            genre_rows = (
+                (title_id, genre_id)
+                for title_id in title_ids
+                for genre_id in self.rng.sample(
+                    genre_ids, min(len(genre_ids), self.rng.randint(1, 3))
+                )
+            )
+            self.report('Созданы связи произведений с жанрами', bulk_insert(
+                GenreTitle, ('title', 'genre'), genre_rows, self.batch_size
+            ))
+        return title_ids
+
+    def create_reviews(self, count, title_ids, user_ids):
+        """
+        Отзывы распределяются по произведениям по закону Ципфа, оценки -
+        вокруг "качества" произведения. Автор оставляет не более одного
+        отзыва на произведение.
+        """
+        start = first_id(Review)
+        counts = distribute(
+            count, zipf_weights(len(title_ids), self.skew), len(user_ids)
+        )
+        rng = self.rng
+
+        def rows():
+            pk = start
+            for title_id, title_count in zip(title_ids, counts):
+                quality = rng.uniform(2, 9)
+                for author_id in rng.sample(user_ids, title_count):
+                    score = min(10, max(1, round(rng.gauss(quality, 2))))
+                    yield (pk, title_id, author_id, score,
+                           self.text(), self.random_date())
+                    pk += 1
+
+        self.report('Созданы отзывы', bulk_insert(
+            Review,
+            ('id', 'title', 'author', 'score', 'text', 'pub_date'),
+            rows(), self.batch_size
+        ))
+        return range(start, start + count)
+
+    def create_comments(self, count, review_ids, user_ids):
+        if not count:
+            return
+        start = first_id(Comment)
+        # популярные отзывы - первые отзывы популярных произведений
+        review_weights = list(accumulate(
+            zipf_weights(len(review_ids), self.skew / 2)
+        ))
+        rows = (
+            (pk, review_id, author_id, self.text(), self.random_date())
+            for pk, review_id, author_id in zip(
+                range(start, start + count),
+                self.rng.choices(
+                    review_ids, cum_weights=review_weights, k=count
+                ),
+                self.rng.choices(user_ids, k=count),
+            )
+        )
+        self.report('Созданы комментарии', bulk_insert(
+            Comment, ('id', 'review', 'author', 'text', 'pub_date'),
+            rows, self.batch_size
+        ))
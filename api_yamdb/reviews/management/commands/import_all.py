@@ -0,0 +1,287 @@
+import csv
+import multiprocessing
+import os
+from collections import deque
+from contextlib import nullcontext
+from queue import Empty
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from .import_to_db import (
+    application_existence_check, CHUNK_TRANSACTION, clear_model,
+    DEFAULT_BATCH_SIZE, FILE_TRANSACTION, import_chunks,
+    MISSING_REPORT_LIMIT, read_chunks
+)
+
+# Количество разобранных пачек в очереди процесса разбора файла
+QUEUE_SIZE = 2
+# Интервал проверки, что процесс разбора файла не завершился аварийно
+QUEUE_TIMEOUT = 1
+
+
+def normalize_name(name):
+    """Имя для сопоставления файла модели: `genre_title.csv` - GenreTitle"""
+    return name.lower().replace('_', '').rstrip('s')
+
+
+def find_model_files(app_config, data_dir):
+    """
+    Сопоставление csv-файлов каталога моделям приложения. Файл
+    `<Модель>.csv` имеет приоритет над файлами, совпадающими с именем
+    модели без учёта регистра, подчёркиваний и окончания `s`.
+    """
+    names = sorted(
+        name for name in os.listdir(data_dir) if name.endswith('.csv')
+    )
+    files = {}
+    for model in app_config.get_models():
+        exact = f'{model.__name__}.csv'
+        if exact in names:
+            files[model] = os.path.join(data_dir, exact)
+            continue
+        similar = [
+            name for name in names
+            if normalize_name(name[:-len('.csv')])
+            == normalize_name(model.__name__)
+        ]
+        if similar:
+            files[model] = os.path.join(data_dir, similar[0])
+    return files
+
+
+def dependency_order(models):
+    """
+    Порядок загрузки моделей: связанные модели раньше ссылающихся на них.
+    Среди готовых к загрузке моделей порядок алфавитный.
+    """
+    dependencies = {
+        model: {
+            field.related_model for field in model._meta.fields
+            if field.is_relation and field.related_model in models
+            and field.related_model is not model
+        }
+        for model in models
+    }
+    order = []
+    while dependencies:
+        ready = sorted(
+            (model for model, related in dependencies.items()
+             if not related),
+            key=lambda model: model.__name__
+        )
+        if not ready:
+            raise CommandError(
+                'Циклическая зависимость моделей: '
+                + ', '.join(model.__name__ for model in dependencies)
+            )
+        for model in ready:
+            del dependencies[model]
+            for related in dependencies.values():
+                related.discard(model)
+        order += ready
+    return order
+
+
+def parse_file(model, file_path, batch_size):
+    """
+    Разбор и проверка файла: значения полей приводятся к типам модели,
+    связи проверяются при записи. Первым значением возвращается
+    заголовок, затем пачки (номер первой строки, записи, ошибки
+    с номерами строк); в памяти находится одна пачка.
+    """
+    with open(file_path, encoding='UTF-8') as file:
+        csv_reader = csv.DictReader(file)
+        fieldnames = csv_reader.fieldnames or []
+        yield fieldnames
+        fields = {}
+        errors = []
+        for column in fieldnames:
+            try:
+                fields[column] = model._meta.get_field(column)
+            except FieldDoesNotExist:
+                errors.append((1, column, 'поле отсутствует в модели'))
+        if errors:
+            yield 1, [], errors
+            return
+        for first_row, records in read_chunks(csv_reader, batch_size):
+            errors = []
+            for number, record in enumerate(records, first_row):
+                errors += convert_record(fields, record, number)
+            yield first_row, records, errors
+
+
+def stream_file(queue, app_label, model_name, file_path, batch_size):
+    """
+    Разбор файла в отдельном процессе с передачей пачек через очередь
+    ограниченного размера: процесс ждёт, пока основной процесс запишет
+    предыдущие пачки. Конец файла - None.
+    """
+    django.setup()
+    try:
+        model = apps.get_model(app_label, model_name)
+        for item in parse_file(model, file_path, batch_size):
+            queue.put(item)
+    except Exception as error:
+        queue.put(CommandError(f'Ошибка разбора файла {file_path}: {error}'))
+    queue.put(None)
+
+
+def receive_file(process, queue):
+    """Заголовок и пачки файла из очереди процесса разбора"""
+    while True:
+        try:
+            item = queue.get(timeout=QUEUE_TIMEOUT)
+        except Empty:
+            if not process.is_alive() and queue.empty():
+                raise CommandError(
+                    'Процесс разбора файла завершился с кодом '
+                    f'{process.exitcode}.'
+                )
+            continue
+        if item is None:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+def valid_chunks(items, errors):
+    """
+    Пачки без ошибок значений до первой ошибки. Ошибки всех пачек
+    добавляются в `errors`, файл дочитывается до конца.
+    """
+    for first_row, records, chunk_errors in items:
+        errors += chunk_errors
+        if not errors:
+            yield first_row, records
+
+
+def convert_record(fields, record, number):
+    """Приведение значений записи к типам полей, связи не изменяются"""
+    errors = []
+    for column, value in record.items():
+        field = fields[column]
+        if field.is_relation:
+            continue
+        try:
+            record[column] = field.to_python(value)
+        except ValidationError as error:
+            errors.append((number, column, ' '.join(error.messages)))
+    return errors
+
+
+def format_errors(file_path, errors):
+    lines = [
+        f'строка {row}: {column}: {message}'
+        for row, column, message in errors[:MISSING_REPORT_LIMIT]
+    ]
+    if len(errors) > MISSING_REPORT_LIMIT:
+        lines.append(f'... всего {len(errors)}')
+    return f'Ошибки в файле {file_path}:\n' + '\n'.join(lines)
+
+
+class Command(BaseCommand):
+    help = (
+        'Загрузка всех csv-файлов каталога данных в модели приложения '
+        'в порядке зависимостей'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('app', nargs='?', default='reviews',
+                            help='Приложение, по умолчанию reviews')
+        parser.add_argument('--batch_size', '--batch-size', type=int,
+                            default=DEFAULT_BATCH_SIZE,
+                            help='Количество строк в пачке')
+        parser.add_argument('--transaction', default=FILE_TRANSACTION,
+                            choices=(FILE_TRANSACTION, CHUNK_TRANSACTION),
+                            help='Одна транзакция на файл или на пачку')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Количество процессов для разбора файлов')
+        parser.add_argument('--clear', action='store_true',
+                            help='Удалить данные из моделей перед загрузкой')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пачки должен быть больше нуля.')
+        app_config = application_existence_check(options['app'])
+        files = find_model_files(app_config, settings.TEST_DATA_DIR)
+        if not files:
+            raise CommandError('Файлы для загрузки не найдены.')
+        order = dependency_order(list(files))
+        self.stdout.write('Порядок загрузки: ' + ', '.join(
+            f'{model.__name__} ({os.path.basename(files[model])})'
+            for model in order
+        ))
+        # в режиме `file` все файлы записываются в одной транзакции:
+        # при ошибке в любом файле база не изменяется
+        import_atomic = (
+            transaction.atomic()
+            if options['transaction'] == FILE_TRANSACTION
+            else nullcontext()
+        )
+        with import_atomic:
+            if options['clear']:
+                for model in reversed(order):
+                    clear_model(model)
+            for model, items in zip(order, self.parse_files(order, files,
+                                                            options)):
+                fieldnames = next(items)
+                errors = []
+                created = import_chunks(
+                    model, fieldnames, valid_chunks(items, errors),
+                    options['transaction']
+                )
+                if errors:
+                    raise CommandError(format_errors(files[model], errors))
+                self.stdout.write(
+                    f'{model.__name__}: записано объектов {created}'
+                )
+
+    def parse_files(self, order, files, options):
+        """
+        Разбор файлов в порядке загрузки. Файлы разбираются параллельно
+        не более чем в `workers` процессах, пока основной процесс
+        записывает пачки предыдущих; процесс следующего файла
+        запускается после записи очередного файла. В памяти находится
+        не больше `QUEUE_SIZE` пачек на процесс.
+        """
+        tasks = deque(
+            (model._meta.app_label, model.__name__, files[model],
+             options['batch_size'])
+            for model in order
+        )
+        if options['workers'] <= 1:
+            for model in order:
+                yield parse_file(model, files[model], options['batch_size'])
+            return
+        context = multiprocessing.get_context()
+        running = deque()
+
+        def start():
+            queue = context.Queue(QUEUE_SIZE)
+            process = context.Process(
+                target=stream_file, args=(queue, *tasks.popleft()),
+                daemon=True
+            )
+            process.start()
+            running.append((process, queue))
+
+        try:
+            while tasks and len(running) < options['workers']:
+                start()
+            while running:
+                process, queue = running[0]
+                yield receive_file(process, queue)
+                process.join()
+                running.popleft()
+                if tasks:
+                    start()
+        finally:
+            for process, queue in running:
+                process.terminate()
+                process.join()
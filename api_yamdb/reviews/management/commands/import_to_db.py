@@ -1,8 +1,22 @@
 import csv
+from contextlib import nullcontext
 
 from django.apps import apps
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from reviews.cache import bump_instance_versions
+from reviews.models import recalculate_title_ratings, Review, Title
+from reviews.search import index_titles, NormalizedFieldsMixin
+
+# Количество строк, связанные объекты которых проверяются одним запросом
+RELATION_BATCH_SIZE = 900
+DEFAULT_BATCH_SIZE = 5000
+FILE_TRANSACTION = 'file'
+CHUNK_TRANSACTION = 'chunk'
+MISSING_REPORT_LIMIT = 20
 
 
 def application_existence_check(app_name):
@@ -31,49 +45,198 @@ def clear_model(model_class):
                         f'возникла ошибка: {ex}')
 
 
-def replace_relation_fields_with_instance(record, model_class):
-    """замена в словаре идентификатора реляционного объекта его экземпляром"""
+def get_relation_columns(model_class, fieldnames):
+    """
+    Реляционные поля модели и столбцы файла с их значениями: столбец
+    может называться по имени поля (`author`) или по имени его столбца
+    в базе (`title_id`)
+    """
+    columns = {}
     for field in model_class._meta.fields:
-        # Если в файле присутствует реляционное поле
-        if field.is_relation and field.name in record:
-            # Проверить наличие объекта в модели
-            # по передаваемому значению из файла
-            if not field.related_model.objects.filter(
-                    pk=record[field.name]).exists():
-                raise ValueError(
-                    'Объект c идентификатором '
-                    f'{field.name}={record[field.name]}, '
-                    f'принадлежащий модели {field.related_model}'
-                    ' не найден.')
-            # при наличии объекта получить его инстанс
-            related_object = field.related_model.objects.get(
-                pk=record[field.name])
-            # замещаем в данных из идентификатор объекта
-            # полученным инстансом
-            record[field.name] = related_object
-    return record
-
-
-def create_objects(model_class, file_path):
-    """Запись данных из файла"""
-    with open(file_path, encoding='UTF-8') as file:
-        csv_reader = csv.DictReader(file)
-        objs = []
-        for value in csv_reader:
-            record = replace_relation_fields_with_instance(
-                dict(value), model_class)
+        if not field.is_relation:
+            continue
+        for column in (field.name, field.attname):
+            if column in fieldnames:
+                columns[field] = column
+                break
+    return columns
+
+
+def resolve_relations(relation_columns, records, first_row):
+    """
+    Замена значений реляционных полей пачки записей идентификаторами
+    `<поле>_id`. Существование объектов проверяется одним запросом IN
+    на связанную модель. Возвращает список отсутствующих объектов
+    с номерами строк файла, значения неверного типа (`title=abc`)
+    также считаются отсутствующими.
+    """
+    missing = []
+    for field, column in relation_columns.items():
+        target = field.target_field
+        values = []
+        invalid = set()
+        for number, record in enumerate(records):
+            value = record.pop(column, None)
+            if value in ('', None):
+                values.append(None)
+                continue
             try:
-                # создать экземпляр объекта из строки файла
-                objs.append(model_class(**record))
-            except Exception as ex:
-                raise Exception('Ошибка создания'
-                                f'экземпляра объекта: {ex}')
-        try:
-            # записать объекты в базу
-            return model_class.objects.bulk_create(objs, len(objs))
+                values.append(target.to_python(value))
+            except ValidationError:
+                values.append(value)
+                invalid.add(number)
+        keys = {
+            value for number, value in enumerate(values)
+            if value is not None and number not in invalid
+        }
+        found = set(field.related_model._default_manager.filter(
+            **{f'{target.attname}__in': keys}
+        ).values_list(target.attname, flat=True)) if keys else set()
+        for number, (record, value) in enumerate(zip(records, values)):
+            record[field.attname] = value
+            if value is not None and (number in invalid or value not in found):
+                missing.append((first_row + number, field.name, value))
+    return missing
 
+
+def format_missing(model_class, missing):
+    """Сообщение об отсутствующих связанных объектах"""
+    lines = [
+        f'строка {row}: {field}={value}'
+        for row, field, value in missing[:MISSING_REPORT_LIMIT]
+    ]
+    if len(missing) > MISSING_REPORT_LIMIT:
+        lines.append(f'... всего {len(missing)}')
+    return (
+        f'Связанные объекты для модели {model_class.__name__} не найдены:\n'
+        + '\n'.join(lines)
+    )
+
+
+def read_chunks(csv_reader, batch_size):
+    """Записи файла пачками по `batch_size` с номером строки первой записи"""
+    chunk = []
+    # первая строка файла - заголовок
+    first_row = 2
+    for record in csv_reader:
+        chunk.append(dict(record))
+        if len(chunk) == batch_size:
+            yield first_row, chunk
+            first_row += len(chunk)
+            chunk = []
+    if chunk:
+        yield first_row, chunk
+
+
+def build_objects(model_class, records):
+    """Создание экземпляров модели из записей файла"""
+    objs = []
+    for record in records:
+        try:
+            # создать экземпляр объекта из строки файла
+            obj = model_class(**record)
+            # bulk_create не вызывает save(), заполнить поля для поиска
+            if isinstance(obj, NormalizedFieldsMixin):
+                obj.normalize_fields()
+            objs.append(obj)
         except Exception as ex:
-            raise Exception(f'Ошибка записи объектов в базу: {ex}')
+            raise Exception('Ошибка создания'
+                            f'экземпляра объекта: {ex}')
+    return objs
+
+
+def write_objects(model_class, objs, rating_title_ids):
+    """
+    Запись пачки объектов в базу. Произведения, рейтинг которых нужно
+    пересчитать после записи файла, добавляются в `rating_title_ids`.
+    """
+    try:
+        model_class.objects.bulk_create(objs)
+    except Exception as ex:
+        raise Exception(f'Ошибка записи объектов в базу: {ex}')
+    sync_denormalized_data(model_class, objs)
+    if model_class is Review:
+        rating_title_ids.update(obj.title_id for obj in objs)
+
+
+def import_chunks(model_class, fieldnames, chunks,
+                  transaction_mode=FILE_TRANSACTION, progress=None):
+    """
+    Запись пачек записей `chunks` (номер первой строки, список записей).
+    В режиме `FILE_TRANSACTION` все пачки записываются в одной транзакции,
+    в режиме `CHUNK_TRANSACTION` - каждая в своей. После записи пачки
+    вызывается `progress` с количеством записанных объектов. Рейтинги
+    произведений пересчитываются один раз после записи всех пачек
+    (в режиме `CHUNK_TRANSACTION` - и при ошибке, для записанных пачек).
+    Возвращает количество записанных объектов.
+    """
+    created = 0
+    missing = []
+    rating_title_ids = set()
+    relation_columns = get_relation_columns(model_class, fieldnames or ())
+    file_atomic = (
+        transaction.atomic() if transaction_mode == FILE_TRANSACTION
+        else nullcontext()
+    )
+    try:
+        with file_atomic:
+            for first_row, records in chunks:
+                chunk_missing = []
+                for start in range(0, len(records), RELATION_BATCH_SIZE):
+                    chunk_missing += resolve_relations(
+                        relation_columns,
+                        records[start:start + RELATION_BATCH_SIZE],
+                        first_row + start
+                    )
+                missing += chunk_missing
+                # пачки с ошибками не записываются, а в общей транзакции
+                # после первой ошибки только проверяются
+                if chunk_missing or (
+                        missing and transaction_mode == FILE_TRANSACTION
+                ):
+                    continue
+                objs = build_objects(model_class, records)
+                if transaction_mode == CHUNK_TRANSACTION:
+                    with transaction.atomic():
+                        write_objects(model_class, objs, rating_title_ids)
+                else:
+                    write_objects(model_class, objs, rating_title_ids)
+                created += len(objs)
+                if progress is not None:
+                    progress(created)
+            if missing:
+                raise ValueError(format_missing(model_class, missing))
+            if transaction_mode == FILE_TRANSACTION:
+                recalculate_title_ratings(rating_title_ids)
+    finally:
+        if transaction_mode == CHUNK_TRANSACTION:
+            recalculate_title_ratings(rating_title_ids)
+    return created
+
+
+def create_objects(model_class, file_path, batch_size=DEFAULT_BATCH_SIZE,
+                   transaction_mode=FILE_TRANSACTION, progress=None):
+    """
+    Запись данных из файла пачками по `batch_size` строк: в памяти
+    находится не больше одной пачки. Возвращает количество записанных
+    объектов.
+    """
+    with open(file_path, encoding='UTF-8') as file:
+        csv_reader = csv.DictReader(file)
+        return import_chunks(
+            model_class, csv_reader.fieldnames,
+            read_chunks(csv_reader, batch_size), transaction_mode, progress
+        )
+
+
+def sync_denormalized_data(model_class, objs):
+    """
+    Обновление данных, которые при обычном сохранении поддерживаются
+    методом save() и сигналами: bulk_create их не вызывает
+    """
+    if model_class is Title:
+        index_titles(objs)
+    bump_instance_versions(*objs)
 
 
 class Command(BaseCommand):
@@ -86,9 +249,17 @@ class Command(BaseCommand):
         parser.add_argument('--clear',
                             action='store_const', const=True,
                             help='Удалить данные из модели')
+        parser.add_argument('--batch_size', '--batch-size', type=int,
+                            default=DEFAULT_BATCH_SIZE,
+                            help='Количество строк в пачке')
+        parser.add_argument('--transaction', default=FILE_TRANSACTION,
+                            choices=(FILE_TRANSACTION, CHUNK_TRANSACTION),
+                            help='Одна транзакция на файл или на пачку')
 
     def handle(self, *args, **options):
         """Обработчик команды"""
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пачки должен быть больше нуля.')
         app_class = application_existence_check(options['app'])
         model_class = model_existence_check(app_class, options['model'])
 
@@ -104,5 +275,12 @@ class Command(BaseCommand):
                 + (options['filename'] or (options['model'] + '.csv'))
             )
             # записать данные в модель из файла
-            if create_objects(model_class, file_path):
+            created = create_objects(
+                model_class, file_path, options['batch_size'],
+                options['transaction'], self.report_progress
+            )
+            if created:
                 self.stdout.write('Запись в модель данных успешно выполнена')
+
+    def report_progress(self, created):
+        self.stdout.write(f'Записано объектов: {created}')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from reviews.search import rebuild_title_index
+
+
+class Command(BaseCommand):
+    help = 'Перестроение полнотекстового индекса произведений'
+
+    def handle(self, *args, **options):
+        rebuild_title_index()
+        self.stdout.write('Поисковый индекс произведений перестроен')
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт рейтингов произведений по таблице отзывов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--title_id', type=int, nargs='*',
+                            help='Идентификаторы произведений')
+
+    def handle(self, *args, **options):
+        titles = Title.objects.all()
+        if options['title_id']:
+            titles = titles.filter(pk__in=options['title_id'])
+        count = titles.recalculate_rating()
+        self.stdout.write(f'Пересчитаны рейтинги произведений: {count}')
@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from reviews.outbox import send_queued_emails
+
+
+class Command(BaseCommand):
+    help = 'Отправка писем из очереди'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch_size', type=int,
+                            help='Количество писем в пачке')
+        parser.add_argument('--once', action='store_true',
+                            help='Отправить письма из очереди и завершиться')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_queued_emails(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(
+                    f'Отправлено писем: {sent}, не отправлено: {failed}'
+                )
+                continue
+            if options['once']:
+                return
+            time.sleep(settings.EMAIL_OUTBOX['POLL_INTERVAL'])
@@ -0,0 +1,72 @@
+import json
+import re
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Замена литералов и списков значений для группировки запросов
+FINGERPRINT_RULES = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def fingerprint(sql):
+    """Нормализованный текст запроса без значений параметров"""
+    for pattern, replacement in FINGERPRINT_RULES:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+class Command(BaseCommand):
+    help = 'Сводка журнала медленных запросов по нормализованному SQL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=None,
+                            help='Файл журнала, по умолчанию из настроек')
+        parser.add_argument('--limit', type=int, default=10,
+                            help='Количество запросов в сводке')
+        parser.add_argument('--order_by', default='total',
+                            choices=('total', 'max', 'count'),
+                            help='Поле сортировки сводки')
+
+    def handle(self, *args, **options):
+        filename = options['file'] or settings.SLOW_QUERY_LOG['FILENAME']
+        groups = defaultdict(lambda: {
+            'count': 0, 'total': 0.0, 'max': 0.0, 'views': set(), 'plan': []
+        })
+        try:
+            with open(filename, encoding='utf-8') as file:
+                for number, line in enumerate(file, 1):
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        self.stderr.write(f'Строка {number} пропущена')
+                        continue
+                    group = groups[fingerprint(entry['sql'])]
+                    group['count'] += 1
+                    group['total'] += entry['duration_ms']
+                    if entry['duration_ms'] >= group['max']:
+                        group['max'] = entry['duration_ms']
+                        group['plan'] = entry.get('plan', [])
+                    group['views'].add(entry.get('view') or '-')
+        except FileNotFoundError:
+            raise CommandError(f'Файл журнала {filename} не найден')
+        worst = sorted(
+            groups.items(), key=lambda item: item[1][options['order_by']],
+            reverse=True
+        )[:options['limit']]
+        for sql, group in worst:
+            self.stdout.write(
+                f'{group["count"]} запр., всего {group["total"]:.1f} мс, '
+                f'среднее {group["total"] / group["count"]:.1f} мс, '
+                f'максимум {group["max"]:.1f} мс, '
+                f'view: {", ".join(sorted(group["views"]))}'
+            )
+            self.stdout.write(f'  {sql}')
+            for row in group['plan']:
+                self.stdout.write(f'    {row}')
@@ -0,0 +1,33 @@
+from django.db import migrations
+
+TITLE_SEARCH_TABLE = 'reviews_title_fts'
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {TITLE_SEARCH_TABLE} '
+        "USING fts5(name, description, tokenize='unicode61')"
+    )
+    schema_editor.execute(
+        f'INSERT INTO {TITLE_SEARCH_TABLE} (rowid, name, description) '
+        'SELECT id, name, description FROM reviews_title'
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f'DROP TABLE IF EXISTS {TITLE_SEARCH_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
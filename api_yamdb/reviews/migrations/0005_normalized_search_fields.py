@@ -0,0 +1,57 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:09
+
+from django.db import migrations, models
+
+NORMALIZED_FIELDS = (
+    ('Category', 'name_normalized', 'name'),
+    ('CustomUser', 'username_normalized', 'username'),
+    ('Genre', 'name_normalized', 'name'),
+    ('Title', 'name_normalized', 'name'),
+)
+
+
+def normalize_search(value):
+    """Нормализация на момент миграции: без регистра, ё - е"""
+    return (value or '').casefold().replace('ё', 'е')
+
+
+def fill_normalized_fields(apps, schema_editor):
+    for model_name, field, source in NORMALIZED_FIELDS:
+        model = apps.get_model('reviews', model_name)
+        objs = list(model.objects.only('pk', source))
+        for obj in objs:
+            setattr(obj, field, normalize_search(getattr(obj, source)))
+        model.objects.bulk_update(objs, (field,), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_title_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='name_normalized',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=256),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='username_normalized',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=150),
+        ),
+        migrations.AddField(
+            model_name='genre',
+            name='name_normalized',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=256),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='name_normalized',
+            field=models.TextField(db_index=True, default='', editable=False),
+        ),
+        migrations.RunPython(
+            fill_normalized_fields, migrations.RunPython.noop
+        ),
+    ]
@@ -2,8 +2,13 @@ from datetime import datetime
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, FloatField, IntegerField, OuterRef, Sum
+from django.db.models import Subquery, Value
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
+from django.utils import timezone
 
+from .search import NormalizedFieldsMixin
 from .validators import (
     max_score_validator, min_score_validator,
     UsernameValidator, UsernameMeValidator, year_validator
@@ -22,9 +27,23 @@ REVIEW_STR = (
     'id: {}, Произведение: {}, Автор: {}, Дата публикации {}, '
     'Оценка: {}, Текст: {}'
 )
+# Количество произведений в одном запросе пересчёта рейтингов
+TITLE_BATCH_SIZE = 900
 
 
-class CustomUser(AbstractUser):
+class UserRoleMixin:
+    """Права пользователя по полям role и is_staff"""
+
+    @property
+    def is_admin(self):
+        return self.role == ADMIN or self.is_staff
+
+    @property
+    def is_moderator(self):
+        return self.role == MODERATOR
+
+
+class CustomUser(NormalizedFieldsMixin, UserRoleMixin, AbstractUser):
     """Расширение модели пользователя"""
     username = models.CharField(
         max_length=150,
@@ -38,27 +57,43 @@ class CustomUser(AbstractUser):
     last_name = models.CharField(max_length=150, blank=True)
     role = models.TextField(default=USER, choices=ROLES)
     bio = models.TextField(blank=True)
-    confirmation_code = models.CharField(max_length=255, blank=True)
+    username_normalized = models.CharField(
+        max_length=150, default='', db_index=True, editable=False
+    )
     REQUIRED_FIELDS = ['email']
+    normalized_fields = {'username_normalized': 'username'}
 
-    def __str__(self):
-        return self.username
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_username = instance.__dict__.get('username')
+        return instance
 
-    @property
-    def is_admin(self):
-        return self.role == ADMIN or self.is_staff
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            # имя нового пользователя ещё не показывается в ответах
+            self._saved_username = self.username
+        super().save(*args, **kwargs)
+        self._saved_username = self.username
 
-    @property
-    def is_moderator(self):
-        return self.role == MODERATOR
+    def username_changed(self):
+        """Изменение имени относительно загруженного из базы"""
+        return getattr(self, '_saved_username', None) != self.username
+
+    def __str__(self):
+        return self.username
 
 
 User = get_user_model()
 
 
-class CategoryAndGenreBase(models.Model):
+class CategoryAndGenreBase(NormalizedFieldsMixin, models.Model):
     name = models.CharField(max_length=256)
+    name_normalized = models.CharField(
+        max_length=256, default='', db_index=True, editable=False
+    )
     slug = models.SlugField(max_length=50, unique=True)
+    normalized_fields = {'name_normalized': 'name'}
 
     class Meta:
         abstract = True
@@ -82,11 +117,65 @@ class Genre(CategoryAndGenreBase):
         verbose_name_plural = 'жанры'
 
 
-class Title(models.Model):
+def rating_expression(score_sum, score_count):
+    """Округлённое среднее оценок, NULL при отсутствии отзывов"""
+    return Cast(
+        Round(Cast(score_sum, FloatField()) / NullIf(score_count, Value(0))),
+        IntegerField()
+    )
+
+
+def recalculate_title_ratings(title_ids):
+    """
+    Полный пересчёт рейтингов произведений `title_ids` запросами не более
+    чем по `TITLE_BATCH_SIZE` id (ограничение SQLite на число параметров)
+    """
+    title_ids = sorted(title_ids)
+    for start in range(0, len(title_ids), TITLE_BATCH_SIZE):
+        Title.objects.filter(
+            pk__in=title_ids[start:start + TITLE_BATCH_SIZE]
+        ).recalculate_rating()
+
+
+class TitleQuerySet(models.QuerySet):
+
+    def update_rating(self, score_delta, count_delta):
+        """Инкрементальное изменение агрегатов оценок одним UPDATE"""
+        score_sum = F('score_sum') + score_delta
+        score_count = F('score_count') + count_delta
+        return self.update(
+            score_sum=score_sum,
+            score_count=score_count,
+            rating=rating_expression(score_sum, score_count),
+        )
+
+    def recalculate_rating(self):
+        """Полный пересчёт агрегатов оценок по таблице отзывов"""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        with transaction.atomic():
+            self.update(
+                score_sum=Coalesce(Subquery(
+                    reviews.annotate(total=Sum('score')).values('total')
+                ), 0),
+                score_count=Coalesce(Subquery(
+                    reviews.annotate(total=Count('pk')).values('total')
+                ), 0),
+            )
+            return self.update(rating=rating_expression(
+                F('score_sum'), F('score_count')
+            ))
+
+
+class Title(NormalizedFieldsMixin, models.Model):
     name = models.TextField(
         verbose_name='Произведение',
         help_text='Введите название произведения'
     )
+    name_normalized = models.TextField(
+        default='', db_index=True, editable=False
+    )
     year = models.IntegerField(
         default=datetime.now().year,
         validators=[year_validator],
@@ -105,9 +194,29 @@ class Title(models.Model):
         help_text='Выберите категорию'
     )
     genre = models.ManyToManyField(Genre, through='GenreTitle')
+    score_sum = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='сумма оценок'
+    )
+    score_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='количество оценок'
+    )
+    rating = models.IntegerField(
+        null=True, editable=False, verbose_name='рейтинг'
+    )
+
+    objects = TitleQuerySet.as_manager()
+    normalized_fields = {'name_normalized': 'name'}
 
     class Meta:
         ordering = ('name',)
+        indexes = [
+            models.Index(fields=('name', 'id'), name='title_name_id_idx'),
+            models.Index(fields=('rating', 'id'), name='title_rating_id_idx'),
+            models.Index(
+                fields=('category', 'rating', 'id'),
+                name='title_category_rating_idx'
+            ),
+        ]
         verbose_name = 'произведение'
         verbose_name_plural = 'произведения'
 
@@ -157,9 +266,60 @@ class Review(CommentAndReviewBase):
                 fields=('title', 'author'), name='unique_review'
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=('title', 'pub_date', 'id'),
+                name='review_title_pub_date_idx'
+            ),
+        ]
         verbose_name = 'отзыв'
         verbose_name_plural = 'отзывы'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_score()
+        return instance
+
+    def _remember_score(self):
+        """Запоминание сохранённых значений для расчёта разницы оценок"""
+        self._saved_title_id = self.__dict__.get('title_id')
+        self._saved_score = self.__dict__.get('score')
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        saved_title_id = getattr(self, '_saved_title_id', None)
+        saved_score = getattr(self, '_saved_score', None)
+        update_fields = kwargs.get('update_fields')
+        # при update_fields в базу записываются только перечисленные поля
+        title_id, score = self.title_id, self.score
+        if update_fields is not None and not adding:
+            if not {'title', 'title_id'} & set(update_fields):
+                title_id = saved_title_id
+            if 'score' not in update_fields:
+                score = saved_score
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            titles = Title.objects.filter(pk=title_id)
+            if adding:
+                titles.update_rating(score, 1)
+            elif saved_title_id is None or saved_score is None:
+                # значения не были загружены из базы - пересчитать полностью
+                Title.objects.filter(
+                    pk__in=(saved_title_id, self.title_id)
+                ).recalculate_rating()
+            elif saved_title_id != title_id:
+                Title.objects.filter(pk=saved_title_id).update_rating(
+                    -saved_score, -1
+                )
+                titles.update_rating(score, 1)
+            elif saved_score != score:
+                titles.update_rating(score - saved_score, 0)
+        if update_fields is None or adding:
+            self._remember_score()
+        elif saved_title_id is not None and saved_score is not None:
+            self._saved_title_id, self._saved_score = title_id, score
+
     def __str__(self):
         return REVIEW_STR.format(
             self.pk,
@@ -181,6 +341,12 @@ class Comment(CommentAndReviewBase):
 
     class Meta(CommentAndReviewBase.Meta):
         default_related_name = 'comments'
+        indexes = [
+            models.Index(
+                fields=('review', 'pub_date', 'id'),
+                name='comment_review_pub_date_idx'
+            ),
+        ]
         verbose_name = 'комментарий'
         verbose_name_plural = 'комментарии'
 
@@ -192,3 +358,56 @@ class Comment(CommentAndReviewBase):
             self.pub_date.strftime('%d.%m.%Y %H:%M:%S'),
             self.text[:15],
         )
+
+
+class ConfirmationCode(models.Model):
+    """Одноразовый код подтверждения с ограниченным сроком действия"""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='confirmation_code',
+        verbose_name='пользователь',
+    )
+    code = models.CharField(max_length=255, verbose_name='код')
+    expires = models.DateTimeField(db_index=True, verbose_name='действует до')
+
+    class Meta:
+        verbose_name = 'код подтверждения'
+        verbose_name_plural = 'коды подтверждения'
+
+    def __str__(self):
+        return f'{self.user_id}: {self.expires}'
+
+
+class OutboxEmail(models.Model):
+    """Письмо в очереди на отправку командой `send_emails`"""
+    subject = models.CharField(max_length=255, verbose_name='тема')
+    body = models.TextField(verbose_name='текст')
+    recipient = models.EmailField(max_length=254, verbose_name='получатель')
+    created = models.DateTimeField(
+        auto_now_add=True, verbose_name='дата создания'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name='попытки отправки'
+    )
+    next_attempt = models.DateTimeField(
+        default=timezone.now, verbose_name='следующая попытка'
+    )
+    last_error = models.TextField(blank=True, verbose_name='последняя ошибка')
+    claimed_by = models.UUIDField(
+        null=True, editable=False, verbose_name='захвачено обработчиком'
+    )
+
+    class Meta:
+        ordering = ('id',)
+        indexes = [
+            models.Index(
+                fields=('next_attempt', 'id'), name='outbox_next_attempt_idx'
+            ),
+        ]
+        verbose_name = 'письмо в очереди'
+        verbose_name_plural = 'очередь писем'
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
@@ -0,0 +1,94 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+
+def queue_email(subject, body, recipient):
+    """
+    Постановка письма в очередь. Вызывается в транзакции, создающей
+    данные письма, и не выполняет отправку.
+    """
+    return OutboxEmail.objects.create(
+        subject=subject, body=body, recipient=recipient
+    )
+
+
+def get_retry_delay(attempts):
+    """Экспоненциальная задержка перед повторной отправкой"""
+    return timedelta(
+        seconds=settings.EMAIL_OUTBOX['RETRY_DELAY'] * 2 ** (attempts - 1)
+    )
+
+
+def claim_emails(now, batch_size):
+    """
+    Захват пачки писем, срок отправки которых наступил. Условный UPDATE
+    переносит срок на `CLAIM_TIMEOUT` вперёд и отмечает письма меткой
+    обработчика, поэтому несколько одновременно запущенных `send_emails`
+    не отправляют одно письмо дважды.
+    """
+    options = settings.EMAIL_OUTBOX
+    due = OutboxEmail.objects.filter(
+        next_attempt__lte=now, attempts__lt=options['MAX_ATTEMPTS']
+    )
+    ids = list(due.order_by('next_attempt', 'id').values_list(
+        'pk', flat=True
+    )[:batch_size])
+    if not ids:
+        return []
+    claim = uuid.uuid4()
+    due.filter(pk__in=ids).update(
+        claimed_by=claim,
+        next_attempt=now + timedelta(seconds=options['CLAIM_TIMEOUT'])
+    )
+    return list(OutboxEmail.objects.filter(claimed_by=claim))
+
+
+def send_queued_emails(batch_size=None, connection=None):
+    """
+    Отправка пачки писем, срок отправки которых наступил, через одно
+    соединение с почтовым сервером. Отправленные письма удаляются из
+    очереди, для остальных назначается повторная попытка.
+    Возвращает количество отправленных и неотправленных писем.
+    """
+    now = timezone.now()
+    emails = claim_emails(
+        now, batch_size or settings.EMAIL_OUTBOX['BATCH_SIZE']
+    )
+    if not emails:
+        return 0, 0
+    connection = connection or get_connection()
+    sent, errors = [], {}
+    try:
+        connection.open()
+    except Exception as error:
+        errors = {email: error for email in emails}
+    else:
+        try:
+            for email in emails:
+                try:
+                    EmailMessage(
+                        email.subject, email.body, None, [email.recipient],
+                        connection=connection
+                    ).send()
+                except Exception as error:
+                    errors[email] = error
+                else:
+                    sent.append(email.pk)
+        finally:
+            connection.close()
+    for email, error in errors.items():
+        email.attempts += 1
+        email.next_attempt = now + get_retry_delay(email.attempts)
+        email.last_error = repr(error)
+        email.claimed_by = None
+    OutboxEmail.objects.filter(pk__in=sent).delete()
+    OutboxEmail.objects.bulk_update(
+        errors, ('attempts', 'next_attempt', 'last_error', 'claimed_by')
+    )
+    return len(sent), len(errors)
@@ -0,0 +1,142 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+TITLE_SEARCH_TABLE = 'reviews_title_fts'
+SEARCH_WORD = re.compile(r'\w+')
+MAX_CHAR = chr(0x10FFFF)
+# суррогаты не кодируются в UTF-8, следующий за U+D7FF символ - U+E000
+SURROGATES = range(0xD800, 0xE000)
+
+
+def normalize_search(value):
+    """Приведение строки к виду для поиска без учёта регистра и буквы ё"""
+    return (value or '').casefold().replace('ё', 'е')
+
+
+def prefix_lookup(field, value):
+    """
+    Поиск по началу нормализованной строки диапазоном
+    `field >= value AND field < следующее значение`, который, в отличие
+    от LIKE, использует индекс поля.
+    """
+    prefix = normalize_search(value)
+    if not prefix or prefix[-1] == MAX_CHAR:
+        return Q(**{f'{field}__startswith': prefix})
+    code = ord(prefix[-1]) + 1
+    if code in SURROGATES:
+        code = SURROGATES.stop
+    upper = prefix[:-1] + chr(code)
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': upper})
+
+
+class NormalizedFieldsMixin:
+    """
+    Заполнение нормализованных полей-копий при сохранении.
+    `normalized_fields` сопоставляет поле-копию исходному полю.
+    """
+    normalized_fields = {}
+
+    def normalize_fields(self):
+        for field, source in self.normalized_fields.items():
+            setattr(self, field, normalize_search(getattr(self, source)))
+
+    def save(self, *args, **kwargs):
+        self.normalize_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {
+                field for field, source in self.normalized_fields.items()
+                if source in update_fields
+            }
+        super().save(*args, **kwargs)
+
+
+def is_supported():
+    """Полнотекстовый индекс FTS5 доступен только в SQLite"""
+    return connection.vendor == 'sqlite'
+
+
+def build_match_query(text):
+    """Преобразование пользовательской строки в безопасный запрос FTS5"""
+    return ' '.join(f'"{word}"*' for word in SEARCH_WORD.findall(text))
+
+
+def index_titles(titles):
+    """Добавление или обновление произведений в поисковом индексе"""
+    if not is_supported():
+        return
+    rows = [(title.pk, title.name, title.description) for title in titles]
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {TITLE_SEARCH_TABLE} WHERE rowid = %s',
+            [(row[0],) for row in rows]
+        )
+        cursor.executemany(
+            f'INSERT INTO {TITLE_SEARCH_TABLE} (rowid, name, description) '
+            'VALUES (%s, %s, %s)',
+            rows
+        )
+
+
+def unindex_titles(title_ids):
+    """Удаление произведений из поискового индекса"""
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {TITLE_SEARCH_TABLE} WHERE rowid = %s',
+            [(title_id,) for title_id in title_ids]
+        )
+
+
+def rebuild_title_index():
+    """Полное перестроение поискового индекса по таблице произведений"""
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TITLE_SEARCH_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {TITLE_SEARCH_TABLE} (rowid, name, description) '
+            'SELECT id, name, description FROM reviews_title'
+        )
+
+
+def purge_title_index():
+    """Удаление из индекса строк произведений, отсутствующих в базе"""
+    if not is_supported():
+        return
+    if TITLE_SEARCH_TABLE not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {TITLE_SEARCH_TABLE} '
+            'WHERE rowid NOT IN (SELECT id FROM reviews_title)'
+        )
+
+
+def search_titles(queryset, text):
+    """
+    Отбор произведений по полнотекстовому индексу с аннотацией
+    `search_rank` (bm25, меньше - релевантнее).
+    """
+    match = build_match_query(text)
+    if not match:
+        return queryset.none()
+    if not is_supported():
+        return queryset.filter(
+            Q(name__icontains=text) | Q(description__icontains=text)
+        )
+    table = queryset.model._meta.db_table
+    # индекс присоединяется один раз: MATCH выполняется однократно,
+    # а rank берётся из той же строки индекса
+    return queryset.extra(
+        tables=[TITLE_SEARCH_TABLE],
+        where=[
+            f'{TITLE_SEARCH_TABLE}.rowid = {table}.id',
+            f'{TITLE_SEARCH_TABLE} MATCH %s',
+        ],
+        params=[match],
+    ).annotate(search_rank=RawSQL(f'{TITLE_SEARCH_TABLE}.rank', ()))
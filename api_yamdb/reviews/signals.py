@@ -0,0 +1,101 @@
+import threading
+
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_migrate, post_save, pre_delete
+)
+from django.dispatch import receiver
+
+from .cache import (
+    bump_instance_versions, bump_versions, CACHE_VERSIONS, GLOBAL_VERSIONS
+)
+from .models import recalculate_title_ratings, Review, Title, User
+from .search import index_titles, purge_title_index, unindex_titles
+from .utils import mark_user_changed, user_cache
+
+
+class ReviewDeletion(threading.local):
+    """
+    Произведения, отзывы которых удаляются одним вызовом delete().
+    Django отправляет pre_delete для всех удаляемых объектов до удаления,
+    а post_delete - после удаления всех строк, поэтому рейтинги
+    пересчитываются одним запросом по первому post_delete. Пересчёт
+    идемпотентен: произведения, оставшиеся после прерванного ошибкой
+    удаления, пересчитываются вместе со следующими без искажения рейтинга.
+    """
+
+    def __init__(self):
+        self.title_ids = set()
+
+
+review_deletion = ReviewDeletion()
+
+
+@receiver(pre_delete, sender=Review)
+def review_deleting(sender, instance, **kwargs):
+    review_deletion.title_ids.add(instance.title_id)
+
+
+@receiver(pre_delete, sender=Title)
+def title_deleting(sender, instance, **kwargs):
+    """
+    Рейтинг удаляемого вместе с отзывами произведения не пересчитывается:
+    pre_delete произведения отправляется после pre_delete его отзывов
+    """
+    review_deletion.title_ids.discard(instance.pk)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """Пересчёт рейтингов произведений удалённых отзывов"""
+    title_ids = review_deletion.title_ids
+    if not title_ids:
+        return
+    review_deletion.title_ids = set()
+    recalculate_title_ratings(title_ids)
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, **kwargs):
+    """Обновление произведения в поисковом индексе"""
+    index_titles([instance])
+
+
+@receiver(post_delete, sender=Title)
+def title_deleted(sender, instance, **kwargs):
+    """Удаление произведения из поискового индекса"""
+    unindex_titles([instance.pk])
+
+
+def data_changed(sender, instance, **kwargs):
+    """Сброс кэша ответов, зависящих от изменённого объекта"""
+    bump_instance_versions(instance)
+
+
+for model in CACHE_VERSIONS:
+    post_save.connect(data_changed, sender=model)
+    post_delete.connect(data_changed, sender=model)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, **kwargs):
+    """Сброс кэша списка произведений при изменении жанров"""
+    bump_versions('title')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, created=False, **kwargs):
+    """Сброс кэша пользователя и данных о нём в выданных токенах"""
+    user_cache.delete(instance.pk)
+    # у нового пользователя ещё нет выданных токенов
+    if not created:
+        mark_user_changed(instance.pk)
+
+
+@receiver(post_migrate)
+def database_migrated(sender, app_config, **kwargs):
+    """Очистка поискового индекса и кэшей после migrate и flush"""
+    if app_config.name == 'reviews':
+        purge_title_index()
+        bump_versions(*GLOBAL_VERSIONS)
+        user_cache.clear()
@@ -1,6 +1,139 @@
+import copy
+import threading
+import time
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_to_epoch
+
+from .models import ConfirmationCode, User
+
+USER_CHANGED_KEY = 'user-changed:{}'
+USER_CLAIMS = ('username', 'role', 'is_staff')
 
 
 def get_tokens_for_user(user):
     """Запрос нового токена"""
-    return RefreshToken.for_user(user).access_token
+    token = RefreshToken.for_user(user).access_token
+    token['iat'] = datetime_to_epoch(token.current_time)
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+def create_confirmation_code(user):
+    """
+    Новый код подтверждения пользователя, заменяющий выданный ранее.
+    Таблица пользователей при этом не изменяется.
+    """
+    code = User.objects.make_random_password(
+        length=settings.LENGTH_CONFORMATION_CODE
+    )
+    ConfirmationCode.objects.update_or_create(user=user, defaults={
+        'code': code,
+        'expires': timezone.now() + timedelta(
+            seconds=settings.CONFIRMATION_CODE_TIMEOUT
+        ),
+    })
+    return code
+
+
+def use_confirmation_code(user, code):
+    """Проверка кода подтверждения с его удалением одним запросом"""
+    deleted, _ = ConfirmationCode.objects.filter(
+        user=user, code=code, expires__gt=timezone.now()
+    ).delete()
+    return bool(deleted)
+
+
+def get_user_changes_cache():
+    return caches[settings.USER_CHANGES['CACHE_ALIAS']]
+
+
+def mark_user_changed(user_id):
+    """
+    Отметка изменения пользователя: данные в выданных ранее токенах
+    и в кэшах пользователей процессов больше не используются. Отметка
+    обновляется и после фиксации транзакции, чтобы данные, прочитанные
+    другим процессом до фиксации, тоже считались устаревшими.
+    """
+    def mark():
+        get_user_changes_cache().set(
+            USER_CHANGED_KEY.format(user_id), time.time(),
+            settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds()
+        )
+    mark()
+    transaction.on_commit(mark)
+
+
+def get_user_changed(user_id):
+    """Время последнего изменения пользователя или None"""
+    return get_user_changes_cache().get(USER_CHANGED_KEY.format(user_id))
+
+
+def has_actual_claims(token):
+    """Данные пользователя в токене не устарели"""
+    if any(claim not in token for claim in (*USER_CLAIMS, 'iat')):
+        return False
+    changed = get_user_changed(token[api_settings.USER_ID_CLAIM])
+    return changed is None or changed < token['iat']
+
+
+class UserCache:
+    """
+    Кэш пользователей процесса с коротким временем жизни. Запись
+    не используется, если пользователь изменён после её чтения из базы
+    (в том числе другим процессом, см. `mark_user_changed`).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.users = {}
+
+    def get(self, user_id, changed=None):
+        with self.lock:
+            expires, loaded, user = self.users.get(user_id, (0, 0, None))
+        if expires < time.monotonic():
+            return None
+        if changed is not None and changed >= loaded:
+            return None
+        # копия, чтобы изменения в запросе не попадали в кэш
+        return copy.deepcopy(user)
+
+    def set(self, user, loaded):
+        """Добавление пользователя, прочитанного из базы в момент `loaded`"""
+        options = settings.USER_CACHE
+        with self.lock:
+            if len(self.users) >= options['MAX_SIZE']:
+                self.users.clear()
+            self.users[user.pk] = (
+                time.monotonic() + options['TIMEOUT'], loaded,
+                copy.deepcopy(user)
+            )
+
+    def delete(self, user_id):
+        with self.lock:
+            self.users.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.users.clear()
+
+
+user_cache = UserCache()
+
+
+def get_cached_user(user_id):
+    """Пользователь из кэша процесса или из базы"""
+    user = user_cache.get(user_id, get_user_changed(user_id))
+    if user is None:
+        loaded = time.time()
+        user = User.objects.get(pk=user_id)
+        user_cache.set(user, loaded)
+    return user
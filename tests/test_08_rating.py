@@ -0,0 +1,117 @@
+import pytest
+from django.core.management import call_command
+
+from .common import create_reviews
+
+
+class Test08RatingAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_rating_after_delete(self, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/')
+        response = admin_client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json().get('rating') == 4, (
+            'Проверьте, что после удаления отзыва `rating` произведения пересчитывается'
+        )
+        user.delete()
+        moderator.delete()
+        response = admin_client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json().get('rating') is None, (
+            'Проверьте, что после каскадного удаления всех отзывов `rating` произведения равен `None`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_recalculate_ratings(self, admin_client, admin):
+        from reviews.models import Title
+
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        Title.objects.update(score_sum=0, score_count=0, rating=None)
+        call_command('recalculate_ratings')
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.score_sum, title.score_count, title.rating) == (12, 3, 4), (
+            'Проверьте, что команда `recalculate_ratings` пересчитывает рейтинги произведений'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_rating_filter_and_ordering(self, client, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        response = client.get('/api/v1/titles/?rating_min=4&rating_max=4')
+        assert [title['id'] for title in response.json()['results']] == [titles[0]['id']], (
+            'Проверьте, что при GET запросе `/api/v1/titles/` фильтуется по параметрам `rating_min` и `rating_max`'
+        )
+        response = client.get('/api/v1/titles/?ordering=-rating')
+        assert [title['id'] for title in response.json()['results']] == [titles[0]['id'], titles[1]['id']], (
+            'Проверьте, что при GET запросе `/api/v1/titles/?ordering=-rating` '
+            'произведения сортируются по убыванию рейтинга, без рейтинга - в конце'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_cascade_delete_queries(self, admin_client, admin):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from reviews.models import Review, Title
+
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        other = Title.objects.create(name='Другое', year=2000)
+        Review.objects.create(title=other, author=admin, text='Отзыв', score=5)
+        with CaptureQueriesContext(connection) as context:
+            admin.delete()
+        updates = [query for query in context.captured_queries
+                   if query['sql'].startswith('UPDATE "reviews_title"')]
+        assert len(updates) == 2 and all('IN' in query['sql'] for query in updates), (
+            'Проверьте, что при каскадном удалении отзывов рейтинги всех произведений '
+            'пересчитываются одним пересчётом'
+        )
+        assert Title.objects.get(pk=other.pk).rating is None
+        with CaptureQueriesContext(connection) as context:
+            Title.objects.get(pk=titles[0]['id']).delete()
+        assert not [query for query in context.captured_queries
+                    if query['sql'].startswith('UPDATE "reviews_title"')], (
+            'Проверьте, что рейтинг удаляемого произведения не обновляется'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_failed_delete(self, admin_client, admin):
+        from unittest import mock
+
+        from django.db import OperationalError
+        from django.db.models.sql.subqueries import DeleteQuery
+        from reviews.models import Review, Title
+
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        other = Title.objects.create(name='Другое', year=2000)
+        extra = Review.objects.create(title=other, author=admin, text='Отзыв', score=5)
+        review = Review.objects.get(pk=reviews[0]['id'])
+        with mock.patch.object(
+            DeleteQuery, 'delete_batch', side_effect=OperationalError('database is locked')
+        ):
+            with pytest.raises(OperationalError):
+                review.delete()
+        extra.delete()
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.score_sum, title.score_count, title.rating) == (12, 3, 4), (
+            'Проверьте, что прерванное ошибкой удаление отзыва не изменяет рейтинг '
+            'при следующих удалениях'
+        )
+        assert Title.objects.get(pk=other.pk).rating is None
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_save_update_fields(self, admin_client, admin):
+        from reviews.models import Review, Title
+
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        review = Review.objects.get(pk=reviews[0]['id'])
+        old_score = review.score
+        review.score = old_score % 10 + 1
+        review.text = 'Новый текст'
+        review.save(update_fields=['text'])
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.score_sum, title.score_count, title.rating) == (12, 3, 4), (
+            'Проверьте, что сохранение отзыва с `update_fields` без оценки не изменяет рейтинг'
+        )
+        review.save(update_fields=['score'])
+        title.refresh_from_db()
+        assert (title.score_sum, title.score_count) == (12 - old_score + review.score, 3), (
+            'Проверьте, что сохранение отзыва с `update_fields` учитывает записанную оценку'
+        )
@@ -0,0 +1,145 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_comments, create_reviews, create_titles
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что при GET запросе `{url}` возвращается статус 200'
+    )
+    return len(context.captured_queries)
+
+
+class Test09QueriesAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_list_queries(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        queries = count_queries(client, '/api/v1/titles/')
+        for index in range(5):
+            admin_client.post('/api/v1/titles/', data={
+                'name': f'Произведение {index}', 'year': 2000,
+                'genre': [genre['slug'] for genre in genres],
+                'category': categories[0]['slug'], 'description': 'Описание'
+            })
+        assert count_queries(client, '/api/v1/titles/') == queries, (
+            'Проверьте, что количество запросов к базе при GET запросе `/api/v1/titles/` '
+            'не зависит от количества произведений на странице'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_title_detail_queries(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        one_genre = count_queries(client, f'/api/v1/titles/{titles[1]["id"]}/')
+        many_genres = count_queries(client, f'/api/v1/titles/{titles[0]["id"]}/')
+        assert one_genre == many_genres, (
+            'Проверьте, что количество запросов к базе при GET запросе `/api/v1/titles/{title_id}/` '
+            'не зависит от количества жанров произведения'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_title_genre_write_queries(self, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        queries = []
+        for slugs in ([genres[0]['slug']], [genre['slug'] for genre in genres]):
+            with CaptureQueriesContext(connection) as context:
+                response = admin_client.post('/api/v1/titles/', data={
+                    'name': 'Жанры', 'year': 2000, 'genre': slugs,
+                    'category': categories[0]['slug'], 'description': 'Описание'
+                })
+            assert response.status_code == 201
+            queries.append(len(context.captured_queries))
+        assert queries[0] == queries[1], (
+            'Проверьте, что количество запросов к базе при POST запросе `/api/v1/titles/` '
+            'не зависит от количества жанров'
+        )
+        response = admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/', data={'genre': [genres[0]['slug'], 'unknown']}
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что при PATCH запросе `/api/v1/titles/{title_id}/` с несуществующим жанром '
+            'возвращается статус 400'
+        )
+        response = admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/', data={'genre': [genres[1]['slug'], genres[2]['slug']]}
+        )
+        assert sorted(response.json()['genre']) == sorted([genres[1]['slug'], genres[2]['slug']]), (
+            'Проверьте, что при PATCH запросе `/api/v1/titles/{title_id}/` жанры произведения обновляются'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_review_create_queries(self, admin_client, user_client):
+        titles, categories, genres = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data={'text': 'Отзыв', 'score': 5})
+        assert response.status_code == 201
+        statements = [query['sql'] for query in context.captured_queries]
+        assert len([sql for sql in statements if sql.startswith('SELECT')
+                    and 'FROM "reviews_title"' in sql]) == 1, (
+            f'Проверьте, что при POST запросе `{url}` произведение запрашивается из базы один раз'
+        )
+        assert not [sql for sql in statements if 'FROM "reviews_review"' in sql], (
+            f'Проверьте, что при POST запросе `{url}` уникальность отзыва проверяется ограничением базы, '
+            'без предварительного запроса отзывов'
+        )
+        response = user_client.post(url, data={'text': 'Отзыв', 'score': 5})
+        assert response.status_code == 400 and 'detail' in response.json(), (
+            f'Проверьте, что повторный POST запрос `{url}` возвращает статус 400'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_nested_detail_queries(self, client, admin_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        review_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        assert count_queries(client, review_url) == 1, (
+            f'Проверьте, что при GET запросе `{review_url}` произведение не запрашивается отдельно от отзыва'
+        )
+        comment_url = f'{review_url}comments/{comments[0]["id"]}/'
+        assert count_queries(client, comment_url) == 1, (
+            f'Проверьте, что при GET запросе `{comment_url}` отзыв не запрашивается отдельно от комментария'
+        )
+        response = client.get(f'/api/v1/titles/{titles[1]["id"]}/reviews/{reviews[0]["id"]}/')
+        assert response.status_code == 404, (
+            'Проверьте, что запрос отзыва другого произведения возвращает статус 404'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_nested_list_queries(self, client, admin_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+        for url, count in ((reviews_url, len(reviews)), (comments_url, len(comments))):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url)
+            assert response.json()['count'] == count
+            assert len(context.captured_queries) == 3, (
+                f'Проверьте, что при GET запросе `{url}` авторы загружаются в одном запросе со списком'
+            )
+            assert '"reviews_customuser"."email"' not in context.captured_queries[-1]['sql'], (
+                f'Проверьте, что при GET запросе `{url}` у авторов запрашиваются только нужные поля'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_object_permission_queries(self, admin_client, admin):
+        from reviews.models import Review
+
+        from api.permissions import IsAdminOrIsModeratorOrIsAuthorOrReadOnly
+
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        review = Review.objects.only('id', 'author').get(pk=reviews[1]['id'])
+        permission = IsAdminOrIsModeratorOrIsAuthorOrReadOnly()
+        request = type('Request', (), {'method': 'PATCH', 'user': user})
+        with CaptureQueriesContext(connection) as context:
+            assert permission.has_object_permission(request, None, review)
+            request.user = moderator
+            assert permission.has_object_permission(request, None, review)
+            request.user = admin
+            assert permission.has_object_permission(request, None, review)
+        assert not context.captured_queries, (
+            'Проверьте, что проверка прав на объект не выполняет запросов к базе'
+        )
@@ -0,0 +1,108 @@
+import pytest
+
+from .common import create_reviews, create_titles
+
+
+class Test10CursorPaginationAPI:
+
+    def crawl(self, client, url):
+        results = []
+        response = client.get(url)
+        while True:
+            assert response.status_code == 200, (
+                f'Проверьте, что при GET запросе `{url}` в курсорном режиме возвращается статус 200'
+            )
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что в курсорном режиме пагинации не выполняется подсчёт `count`'
+            )
+            results.extend(data['results'])
+            if not data['next']:
+                return results
+            response = client.get(data['next'])
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_cursor(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        for index in range(12):
+            admin_client.post('/api/v1/titles/', data={
+                'name': 'Повтор', 'year': 2000, 'genre': [genres[0]['slug']],
+                'category': categories[0]['slug'], 'description': str(index)
+            })
+        results = self.crawl(client, '/api/v1/titles/?pagination=cursor')
+        assert len({title['id'] for title in results}) == 14, (
+            'Проверьте, что при обходе `/api/v1/titles/` в курсорном режиме '
+            'возвращаются все произведения без повторов'
+        )
+        assert [title['name'] for title in results] == sorted(title['name'] for title in results), (
+            'Проверьте, что в курсорном режиме произведения отсортированы по `name`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_cursor(self, client, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        results = self.crawl(
+            client, f'/api/v1/titles/{titles[0]["id"]}/reviews/?pagination=cursor'
+        )
+        assert [review['id'] for review in results] == [review['id'] for review in reviews], (
+            'Проверьте, что при обходе `/api/v1/titles/{title_id}/reviews/` в курсорном режиме '
+            'отзывы возвращаются в порядке `pub_date`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_composite_cursor(self, client, admin_client):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        titles, categories, genres = create_titles(admin_client)
+        for index in range(25):
+            admin_client.post('/api/v1/titles/', data={
+                'name': f'Повтор {index}', 'year': 2000, 'genre': [genres[0]['slug']],
+                'category': categories[0]['slug'], 'description': str(index)
+            })
+        url = '/api/v1/titles/?pagination=cursor&ordering=-year'
+        with CaptureQueriesContext(connection) as context:
+            results = self.crawl(client, url)
+        assert len({title['id'] for title in results}) == 27, (
+            'Проверьте, что в курсорном режиме при равных значениях поля сортировки '
+            'возвращаются все произведения без повторов'
+        )
+        assert not [query for query in context.captured_queries if 'OFFSET' in query['sql']], (
+            'Проверьте, что позиция курсора содержит `id` и запросы страниц не используют OFFSET'
+        )
+        response = client.get(url)
+        response = client.get(response.json()['next'])
+        previous = client.get(response.json()['previous']).json()
+        assert [title['id'] for title in previous['results']] == [title['id'] for title in results[:10]], (
+            'Проверьте, что ссылка `previous` в курсорном режиме возвращает предыдущую страницу'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_nullable_ordering(self, client, admin_client, admin):
+        from reviews.models import Title
+
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        for index in range(24):
+            Title.objects.create(name=f'Без отзывов {index}', year=2000 + index % 3)
+        Title.objects.filter(name__endswith='7').update(rating=7)
+        for ordering in ('-rating', 'rating', 'rating,-year', '-rating,year'):
+            expected = []
+            url = f'/api/v1/titles/?ordering={ordering}'
+            while url:
+                data = client.get(url).json()
+                expected.extend(title['id'] for title in data['results'])
+                url = data['next']
+            url = f'/api/v1/titles/?ordering={ordering}&pagination=cursor'
+            results = self.crawl(client, url)
+            assert [title['id'] for title in results] == expected, (
+                'Проверьте, что при сортировке по полю с пустыми значениями курсорный режим '
+                'возвращает те же произведения в том же порядке, что и постраничный'
+            )
+            last = client.get(url).json()
+            while last['next']:
+                last = client.get(last['next']).json()
+            start = len(expected) - len(last['results'])
+            previous = client.get(last['previous']).json()
+            assert [title['id'] for title in previous['results']] == expected[start - 10:start], (
+                'Проверьте, что ссылка `previous` в курсорном режиме учитывает пустые значения'
+            )
@@ -0,0 +1,91 @@
+import pytest
+
+from .common import create_titles
+
+
+class Test11SearchAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title_search(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        response = client.get('/api/v1/titles/?search=драма')
+        assert response.status_code == 200, (
+            'Проверьте, что при GET запросе `/api/v1/titles/?search=` возвращается статус 200'
+        )
+        data = response.json()
+        assert [title['id'] for title in data['results']] == [titles[1]['id']], (
+            'Проверьте, что параметр `search` ищет произведения по названию и описанию'
+        )
+        response = client.get('/api/v1/titles/?search=пов')
+        assert [title['id'] for title in response.json()['results']] == [titles[0]['id']], (
+            'Проверьте, что параметр `search` находит произведения по началу слова'
+        )
+        response = client.get('/api/v1/titles/?search="')
+        assert response.status_code == 200 and response.json()['count'] == 0, (
+            'Проверьте, что параметр `search` без слов возвращает пустой список'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_title_search_sync(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        admin_client.patch(f'/api/v1/titles/{titles[0]["id"]}/', data={'name': 'Разворот'})
+        response = client.get('/api/v1/titles/?search=разворот')
+        assert [title['id'] for title in response.json()['results']] == [titles[0]['id']], (
+            'Проверьте, что поисковый индекс обновляется при изменении произведения'
+        )
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        response = client.get('/api/v1/titles/?search=разворот')
+        assert response.json()['count'] == 0, (
+            'Проверьте, что поисковый индекс обновляется при удалении произведения'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_normalized_search(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        response = client.get('/api/v1/titles/?name=пОВОРОТ')
+        assert [title['id'] for title in response.json()['results']] == [titles[0]['id']], (
+            'Проверьте, что фильтр `name` ищет произведения по началу названия без учёта регистра'
+        )
+        response = client.get('/api/v1/categories/?search=кни')
+        assert response.json()['results'] == [categories[1]], (
+            'Проверьте, что при GET запросе `/api/v1/categories/?search=` '
+            'поиск выполняется по началу названия без учёта регистра'
+        )
+        response = client.get('/api/v1/genres/?search=УЖАС')
+        assert response.json()['results'] == [genres[0]], (
+            'Проверьте, что при GET запросе `/api/v1/genres/?search=` '
+            'поиск выполняется по началу названия без учёта регистра'
+        )
+        for url in ('/api/v1/titles/?name=%ED%9F%BF', '/api/v1/genres/?search=%ED%9F%BF',
+                    '/api/v1/categories/?search=%ED%9F%BF'):
+            response = client.get(url)
+            assert response.status_code == 200 and response.json()['results'] == [], (
+                'Проверьте, что поиск по началу строки, оканчивающейся символом U+D7FF, '
+                'не передаёт в базу суррогатные символы'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_title_search_many(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        created = []
+        for index in range(12):
+            response = admin_client.post('/api/v1/titles/', data={
+                'name': f'Драма {index}', 'year': 2000, 'genre': [genres[0]['slug']],
+                'category': categories[0]['slug'], 'description': 'Описание'
+            })
+            created.append(response.json()['id'])
+        response = client.get('/api/v1/titles/?search=драма')
+        assert response.json()['count'] == 13, (
+            'Проверьте, что параметр `search` возвращает все найденные произведения'
+        )
+        results = []
+        response = client.get('/api/v1/titles/', {'search': 'драма', 'pagination': 'cursor'})
+        while True:
+            data = response.json()
+            results += [title['id'] for title in data['results']]
+            if not data['next']:
+                break
+            response = client.get(data['next'])
+        assert sorted(results) == sorted(created + [titles[1]['id']]), (
+            'Проверьте, что в курсорном режиме при поиске возвращаются все найденные произведения'
+        )
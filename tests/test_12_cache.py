@@ -0,0 +1,112 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_categories, create_reviews, create_titles
+
+
+class Test12ResponseCacheAPI:
+
+    def check_cache(self, client, admin_client):
+        categories = create_categories(admin_client)
+        response = client.get('/api/v1/categories/')
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что первый GET запрос `/api/v1/categories/` выполняется без кэша'
+        )
+        response = client.get('/api/v1/categories/')
+        assert response['X-Cache'] == 'HIT', (
+            'Проверьте, что повторный GET запрос `/api/v1/categories/` анонимного пользователя '
+            'отдаётся из кэша'
+        )
+        assert response.json()['count'] == len(categories)
+        admin_client.post('/api/v1/categories/', data={'name': 'Музыка', 'slug': 'music'})
+        response = client.get('/api/v1/categories/')
+        assert response['X-Cache'] == 'MISS' and response.json()['count'] == len(categories) + 1, (
+            'Проверьте, что создание категории сбрасывает кэш списка категорий'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_locmem_cache(self, client, admin_client):
+        self.check_cache(client, admin_client)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_file_cache(self, client, admin_client, settings, tmp_path):
+        settings.CACHES = {**settings.CACHES, 'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        }}
+        self.check_cache(client, admin_client)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_titles_cache_invalidation(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        client.get('/api/v1/titles/')
+        admin_client.patch(f'/api/v1/titles/{titles[0]["id"]}/', data={'genre': [genres[2]['slug']]})
+        response = client.get(f'/api/v1/titles/?genre={genres[2]["slug"]}')
+        assert response.json()['count'] == 2, (
+            'Проверьте, что изменение жанров произведения сбрасывает кэш списка произведений'
+        )
+        admin_client.delete(f'/api/v1/genres/{genres[2]["slug"]}/')
+        response = client.get('/api/v1/titles/')
+        assert genres[2] not in response.json()['results'][0]['genre'], (
+            'Проверьте, что удаление жанра сбрасывает кэш списка произведений'
+        )
+        assert admin_client.get('/api/v1/titles/').get('X-Cache') is None, (
+            'Проверьте, что ответы авторизованным пользователям не кэшируются'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_conditional_get(self, client, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = client.get(url)
+        etag = response.get('ETag')
+        assert etag and response.get('Last-Modified'), (
+            f'Проверьте, что ответ на GET запрос `{url}` содержит заголовки `ETag` и `Last-Modified`'
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304 and not context.captured_queries, (
+            f'Проверьте, что GET запрос `{url}` с актуальным `If-None-Match` '
+            'возвращает статус 304 без запросов к базе'
+        )
+        response = client.get(f'{url}{reviews[0]["id"]}/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что `ETag` списка не подходит для отдельного отзыва'
+        )
+        admin_client.patch(f'{url}{reviews[0]["id"]}/', data={'text': 'Изменено'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200 and response['ETag'] != etag, (
+            'Проверьте, что изменение отзыва меняет `ETag` списка отзывов'
+        )
+        comments_url = f'{url}{reviews[0]["id"]}/comments/'
+        etag = client.get(comments_url)['ETag']
+        admin_client.post(comments_url, data={'text': 'Комментарий'})
+        assert client.get(comments_url, HTTP_IF_NONE_MATCH=etag).status_code == 200, (
+            'Проверьте, что новый комментарий меняет `ETag` списка комментариев'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_cache_key_host(self, client, admin_client):
+        for index in range(12):
+            admin_client.post('/api/v1/categories/', data={'name': f'Категория {index}', 'slug': f'slug-{index}'})
+        client.get('/api/v1/categories/', HTTP_HOST='evil.example')
+        response = client.get('/api/v1/categories/')
+        assert response['X-Cache'] == 'MISS' and 'evil.example' not in response.json()['next'], (
+            'Проверьте, что ключ кэша ответов включает хост запроса'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_etag_user_changes(self, client, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        etag = client.get(reviews_url)['ETag']
+        admin_client.post('/api/v1/users/', data={'username': 'newcomer', 'email': 'newcomer@yamdb.fake'})
+        assert client.get(reviews_url, HTTP_IF_NONE_MATCH=etag).status_code == 304, (
+            'Проверьте, что создание пользователя не меняет `ETag` списка отзывов'
+        )
+        admin_client.patch(f'/api/v1/users/{user.username}/', data={'username': 'renamed'})
+        response = client.get(reviews_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200 and 'renamed' in [review['author'] for review in response.json()['results']], (
+            'Проверьте, что смена имени автора меняет `ETag` списка отзывов'
+        )
@@ -0,0 +1,131 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .common import create_users_api
+
+
+def claims_client(user):
+    from reviews.utils import get_tokens_for_user
+
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_tokens_for_user(user)}')
+    return client
+
+
+class Test13AuthenticationAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_read_without_user_query(self, admin):
+        client = claims_client(admin)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/categories/')
+        assert response.status_code == 200
+        assert not [query for query in context.captured_queries
+                    if '"reviews_customuser"' in query['sql']], (
+            'Проверьте, что GET запрос с токеном из `get_tokens_for_user` '
+            'не загружает пользователя из базы'
+        )
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == 200 and response.json()['email'] == admin.email, (
+            'Проверьте, что GET запрос `/api/v1/users/me/` возвращает данные пользователя'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_role_change(self, admin_client, admin):
+        user, moderator = create_users_api(admin_client)
+        client = claims_client(moderator)
+        response = client.get('/api/v1/users/')
+        assert response.status_code == 403
+        admin_client.patch(f'/api/v1/users/{moderator.username}/', data={'role': 'admin'})
+        response = client.get('/api/v1/users/')
+        assert response.status_code == 200, (
+            'Проверьте, что после изменения роли пользователя данные в выданном ранее токене '
+            'не используются'
+        )
+        admin_client.patch(f'/api/v1/users/{moderator.username}/', data={'role': 'user'})
+        response = client.post('/api/v1/categories/', data={'name': 'Музыка', 'slug': 'music'})
+        assert response.status_code == 403, (
+            'Проверьте, что после понижения роли пользователь теряет права администратора'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_token_cache(self, admin):
+        from api.authentication import token_cache
+
+        client = claims_client(admin)
+        client.get('/api/v1/categories/')
+        before = token_cache.as_dict()
+        client.get('/api/v1/genres/')
+        after = token_cache.as_dict()
+        assert after['hits'] == before['hits'] + 1, (
+            'Проверьте, что повторный запрос с тем же токеном использует кэш проверенных токенов'
+        )
+        client.credentials(HTTP_AUTHORIZATION='Bearer invalid')
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == 401, (
+            'Проверьте, что недействительный токен не проходит аутентификацию'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_confirmation_code(self, client):
+        from reviews.models import ConfirmationCode
+
+        data = {'email': 'code@yamdb.fake', 'username': 'code_user'}
+        client.post('/api/v1/auth/signup/', data=data)
+        with CaptureQueriesContext(connection) as context:
+            response = client.post('/api/v1/auth/signup/', data=data)
+        assert response.status_code == 200
+        assert not [query for query in context.captured_queries
+                    if query['sql'].startswith(('UPDATE "reviews_customuser"',
+                                                'INSERT INTO "reviews_customuser"'))], (
+            'Проверьте, что повторная регистрация не изменяет таблицу пользователей'
+        )
+        code = ConfirmationCode.objects.get(user__username=data['username']).code
+        token_data = {'username': data['username'], 'confirmation_code': code}
+        response = client.post('/api/v1/auth/token/', data=token_data)
+        assert response.status_code == 200 and 'token' in response.json()
+        response = client.post('/api/v1/auth/token/', data=token_data)
+        assert response.status_code == 400, (
+            'Проверьте, что код подтверждения можно использовать только один раз'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_demotion_survives_cache_eviction(self, client, admin_client):
+        from reviews.models import User
+
+        admin_client.post('/api/v1/users/', data={
+            'username': 'second_admin', 'email': 'second_admin@yamdb.fake', 'role': 'admin'
+        })
+        second_admin = claims_client(User.objects.get(username='second_admin'))
+        assert second_admin.get('/api/v1/users/').status_code == 200
+        admin_client.patch('/api/v1/users/second_admin/', data={'role': 'user'})
+        assert second_admin.get('/api/v1/users/').status_code == 403
+        for year in range(400):
+            client.get(f'/api/v1/titles/?year={year}')
+        assert second_admin.get('/api/v1/users/').status_code == 403, (
+            'Проверьте, что отметки изменения пользователя не вытесняются кэшем ответов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_demotion_in_other_process(self, admin_client):
+        from reviews.models import User
+        from reviews.utils import mark_user_changed
+
+        admin_client.post('/api/v1/users/', data={
+            'username': 'second_admin', 'email': 'second_admin@yamdb.fake', 'role': 'admin'
+        })
+        user = User.objects.get(username='second_admin')
+        second_admin = claims_client(user)
+        response = second_admin.post('/api/v1/categories/', data={'name': 'Фильм', 'slug': 'film'})
+        assert response.status_code == 201
+        # изменение другим процессом: кэш пользователей этого процесса не очищается
+        User.objects.filter(pk=user.pk).update(role='user')
+        mark_user_changed(user.pk)
+        assert second_admin.get('/api/v1/users/').status_code == 403, (
+            'Проверьте, что кэш пользователей процесса учитывает отметки изменения '
+            'пользователя другими процессами'
+        )
+        response = second_admin.post('/api/v1/categories/', data={'name': 'Книга', 'slug': 'book'})
+        assert response.status_code == 403
@@ -0,0 +1,75 @@
+from unittest import mock
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+
+
+class Test14EmailOutbox:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_signup_queues_email(self, client):
+        from reviews.models import OutboxEmail
+
+        data = {'email': 'outbox@yamdb.fake', 'username': 'outbox_user'}
+        outbox_before_count = len(mail.outbox)
+        response = client.post('/api/v1/auth/signup/', data=data)
+        assert response.status_code == 200
+        assert len(mail.outbox) == outbox_before_count, (
+            'Проверьте, что `/api/v1/auth/signup/` не отправляет письмо во время запроса'
+        )
+        assert OutboxEmail.objects.filter(recipient=data['email']).count() == 1, (
+            'Проверьте, что `/api/v1/auth/signup/` добавляет письмо в очередь'
+        )
+        call_command('send_emails', '--once')
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            'Проверьте, что команда `send_emails` отправляет письма из очереди'
+        )
+        assert not OutboxEmail.objects.exists(), (
+            'Проверьте, что отправленные письма удаляются из очереди'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_retry(self, client):
+        from reviews.models import OutboxEmail
+        from reviews.outbox import send_queued_emails
+
+        client.post(
+            '/api/v1/auth/signup/',
+            data={'email': 'retry@yamdb.fake', 'username': 'retry_user'}
+        )
+        with mock.patch(
+            'django.core.mail.EmailMessage.send', side_effect=OSError('down')
+        ):
+            assert send_queued_emails() == (0, 1)
+        email = OutboxEmail.objects.get()
+        assert email.attempts == 1 and 'down' in email.last_error, (
+            'Проверьте, что неотправленное письмо остаётся в очереди с ошибкой'
+        )
+        assert send_queued_emails() == (0, 0), (
+            'Проверьте, что повторная отправка выполняется после задержки'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_concurrent_workers(self, client):
+        from django.core.mail import EmailMessage
+        from reviews.outbox import send_queued_emails
+
+        client.post(
+            '/api/v1/auth/signup/',
+            data={'email': 'claim@yamdb.fake', 'username': 'claim_user'}
+        )
+        outbox_before_count = len(mail.outbox)
+        original_send = EmailMessage.send
+        concurrent = []
+
+        def send(message, *args, **kwargs):
+            # второй обработчик запускается во время отправки первым
+            concurrent.append(send_queued_emails())
+            return original_send(message, *args, **kwargs)
+
+        with mock.patch('django.core.mail.EmailMessage.send', send):
+            assert send_queued_emails() == (1, 0)
+        assert concurrent == [(0, 0)] and len(mail.outbox) == outbox_before_count + 1, (
+            'Проверьте, что письмо, захваченное одним обработчиком, не отправляется другим'
+        )
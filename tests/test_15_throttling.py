@@ -0,0 +1,82 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.fixture
+def buckets():
+    from api.throttling import local_buckets
+
+    local_buckets.clear()
+    yield local_buckets
+    local_buckets.clear()
+
+
+class Test15ThrottlingAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_token_username_limit(self, client, buckets):
+        data = {'username': 'unexisting_user', 'confirmation_code': '12345'}
+        for _ in range(5):
+            response = client.post('/api/v1/auth/token/', data=data)
+            assert response.status_code == 404
+        with CaptureQueriesContext(connection) as context:
+            response = client.post('/api/v1/auth/token/', data=data)
+        assert response.status_code == 429, (
+            'Проверьте, что частые запросы к `/api/v1/auth/token/` с одним username '
+            'отклоняются со статусом 429'
+        )
+        assert not context.captured_queries, (
+            'Проверьте, что отклонённый запрос не обращается к базе'
+        )
+        assert 'Retry-After' in response
+        data['username'] = 'other_user'
+        response = client.post('/api/v1/auth/token/', data=data)
+        assert response.status_code == 404, (
+            'Проверьте, что ограничение по username не затрагивает других пользователей'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_signup_ip_limit(self, client, buckets, settings):
+        settings.AUTH_THROTTLE = {
+            **settings.AUTH_THROTTLE, 'RATES': {'ip': (2, 60), 'username': (5, 60)}
+        }
+        for number in range(2):
+            response = client.post('/api/v1/auth/signup/', data={
+                'email': f'ip{number}@yamdb.fake', 'username': f'ip_user{number}'
+            })
+            assert response.status_code == 200
+        response = client.post('/api/v1/auth/signup/', data={
+            'email': 'ip2@yamdb.fake', 'username': 'ip_user2'
+        })
+        assert response.status_code == 429, (
+            'Проверьте, что частые запросы к `/api/v1/auth/signup/` с одного IP '
+            'отклоняются со статусом 429'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_forwarded_for_and_body(self, client, buckets, settings):
+        settings.AUTH_THROTTLE = {
+            **settings.AUTH_THROTTLE, 'RATES': {'ip': (3, 60), 'username': (5, 60)}
+        }
+        response = client.post('/api/v1/auth/token/', data=[], content_type='application/json')
+        assert response.status_code == 400, (
+            'Проверьте, что запрос к `/api/v1/auth/token/` с JSON-массивом возвращает статус 400'
+        )
+        for number in range(2):
+            client.post('/api/v1/auth/token/', data={}, HTTP_X_FORWARDED_FOR=f'10.0.0.{number}')
+        response = client.post('/api/v1/auth/token/', data={}, HTTP_X_FORWARDED_FOR='10.0.0.9')
+        assert response.status_code == 429, (
+            'Проверьте, что ограничение по IP не обходится подменой заголовка X-Forwarded-For'
+        )
+
+    def test_04_prune_keeps_used_buckets(self, buckets, settings):
+        settings.AUTH_THROTTLE = {**settings.AUTH_THROTTLE, 'MAX_SIZE': 3}
+        buckets.consume('stale', 5, 5 / 60, -100)
+        buckets.consume('ip', 60, 1, 0)
+        buckets.consume('username', 5, 5 / 60, 0)
+        buckets.consume('other', 5, 5 / 60, 0.5)
+        assert 'stale' not in buckets.buckets and 'ip' in buckets.buckets, (
+            'Проверьте, что очистка корзин удаляет полные корзины '
+            'с учётом ёмкости каждой корзины'
+        )
@@ -0,0 +1,45 @@
+import pytest
+
+
+class Test16MetricsAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_metrics(self, client, user_client, admin_client):
+        from api.metrics import request_metrics
+
+        request_metrics.clear()
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        assert user_client.get('/api/v1/metrics/').status_code == 403, (
+            'Проверьте, что `/api/v1/metrics/` доступен только администратору'
+        )
+        response = admin_client.get('/api/v1/metrics/')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain'), (
+            'Проверьте, что `/api/v1/metrics/` возвращает метрики в текстовом формате Prometheus'
+        )
+        text = response.content.decode()
+        labels = 'route="api/v1/titles/$",method="GET"'
+        for name in ('yamdb_request_duration_seconds', 'yamdb_request_queries',
+                     'yamdb_request_sql_seconds', 'yamdb_request_serialization_seconds'):
+            assert f'{name}_count{{{labels}}} 2' in text, (
+                f'Проверьте, что `/api/v1/metrics/` содержит гистограмму `{name}` '
+                'по маршруту и методу'
+            )
+        assert f'yamdb_request_queries_bucket{{{labels},le="+Inf"}} 2' in text
+        assert 'yamdb_response_cache_requests_total{result="hits"}' in text
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_unknown_methods(self, client, admin_client):
+        from api.metrics import request_metrics
+
+        request_metrics.clear()
+        for method in ('FOO', 'BAR', 'BAZ"'):
+            client.generic(method, '/api/v1/titles/')
+        text = admin_client.get('/api/v1/metrics/').content.decode()
+        assert 'method="FOO"' not in text and 'BAZ' not in text, (
+            'Проверьте, что произвольные методы не создают отдельных меток в метриках'
+        )
+        assert 'yamdb_request_duration_seconds_count{route="api/v1/titles/$",method="other"} 3' in text, (
+            'Проверьте, что запросы с неизвестными методами учитываются с меткой `method="other"`'
+        )
@@ -0,0 +1,62 @@
+import json
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+
+
+class Test17SlowQueries:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_slow_query_log(self, client, settings, tmp_path):
+        from api import slow_queries
+
+        settings.SLOW_QUERY_LOG = {**settings.SLOW_QUERY_LOG, 'THRESHOLD_MS': 0}
+        with mock.patch.object(slow_queries.logger, 'warning') as warning:
+            client.get('/api/v1/titles/?name=abc')
+        entries = [json.loads(call.args[0]) for call in warning.call_args_list]
+        assert entries, (
+            'Проверьте, что запросы дольше `SLOW_QUERY_LOG["THRESHOLD_MS"]` записываются в журнал'
+        )
+        entry = next(entry for entry in entries if 'reviews_title' in entry['sql'])
+        assert entry['view'] == 'titles-list' and entry['plan'], (
+            'Проверьте, что в журнал записываются view и план выполнения запроса'
+        )
+        assert {'sql', 'params', 'duration_ms', 'stack'} <= set(entry)
+
+        log = tmp_path / 'slow.log'
+        log.write_text(
+            '\n'.join(json.dumps(entry) for entry in entries * 2), encoding='utf-8'
+        )
+        out = StringIO()
+        call_command('slow_query_report', '--file', str(log), stdout=out)
+        assert 'titles-list' in out.getvalue(), (
+            'Проверьте, что команда `slow_query_report` выводит сводку по журналу'
+        )
+
+    def test_02_fingerprint(self):
+        from reviews.management.commands.slow_query_report import fingerprint
+
+        assert fingerprint(
+            "SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'a''b'"
+        ) == fingerprint("SELECT *  FROM t WHERE id IN (%s) AND name = %s"), (
+            'Проверьте, что запросы с разными значениями имеют одинаковый отпечаток'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_params_opt_in(self, client, settings):
+        from api import slow_queries
+
+        settings.SLOW_QUERY_LOG = {**settings.SLOW_QUERY_LOG, 'THRESHOLD_MS': 0}
+        with mock.patch.object(slow_queries.logger, 'warning') as warning:
+            client.get('/api/v1/titles/?name=secretvalue')
+        assert not [call for call in warning.call_args_list if 'secretvalue' in call.args[0]], (
+            'Проверьте, что значения параметров запросов не записываются в журнал по умолчанию'
+        )
+        settings.SLOW_QUERY_LOG = {**settings.SLOW_QUERY_LOG, 'LOG_PARAMS': True}
+        with mock.patch.object(slow_queries.logger, 'warning') as warning:
+            client.get('/api/v1/titles/?name=othervalue')
+        assert [call for call in warning.call_args_list if 'othervalue' in call.args[0]], (
+            'Проверьте, что при `LOG_PARAMS` значения параметров записываются в журнал'
+        )
@@ -0,0 +1,53 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+def generate(**options):
+    call_command('generate_dataset', stdout=StringIO(), **options)
+
+
+class Test18GenerateDataset:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_generate_dataset(self):
+        from reviews.models import Comment, Review, Title, User
+
+        generate(reviews=300, users=30, titles=20, comments=100, seed=1)
+        assert (User.objects.count(), Title.objects.count(),
+                Review.objects.count(), Comment.objects.count()) == (30, 20, 300, 100), (
+            'Проверьте, что команда `generate_dataset` создаёт заданное количество объектов'
+        )
+        counts = list(Title.objects.order_by('id').values_list('score_count', flat=True))
+        assert counts[0] > counts[-1], (
+            'Проверьте, что отзывы распределяются по произведениям неравномерно'
+        )
+        title = Title.objects.order_by('id').first()
+        Title.objects.filter(pk=title.pk).recalculate_rating()
+        assert Title.objects.get(pk=title.pk).rating == title.rating is not None, (
+            'Проверьте, что команда `generate_dataset` заполняет рейтинги произведений'
+        )
+        from reviews.search import search_titles
+
+        assert title in search_titles(Title.objects.all(), title.name), (
+            'Проверьте, что команда `generate_dataset` обновляет поисковый индекс'
+        )
+        first = list(Review.objects.values_list('title_id', 'author_id', 'score', 'text'))
+        Comment.objects.all().delete()
+        Review.objects.all().delete()
+        Title.objects.all().delete()
+        User.objects.all().delete()
+        generate(reviews=300, users=30, titles=20, comments=100, seed=1)
+        second = list(Review.objects.values_list('title_id', 'author_id', 'score', 'text'))
+        offset = first[0][0] - second[0][0], first[0][1] - second[0][1]
+        assert [(t + offset[0], a + offset[1], s, x) for t, a, s, x in second] == first, (
+            'Проверьте, что команда `generate_dataset` с одинаковым `--seed` создаёт одинаковые данные'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_too_many_reviews(self):
+        from django.core.management.base import CommandError
+
+        with pytest.raises(CommandError):
+            generate(reviews=10, users=2, titles=2)
@@ -0,0 +1,49 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+class Test19Benchmark:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_benchmark(self, tmp_path):
+        from reviews.models import User
+
+        call_command('generate_dataset', reviews=200, users=20, titles=10,
+                     comments=50, stdout=StringIO())
+        users_count = User.objects.count()
+        output = tmp_path / 'benchmark.json'
+        call_command('benchmark', requests=60, warmup=10, users=5,
+                     output=str(output), stdout=StringIO())
+        result = json.loads(output.read_text(encoding='utf-8'))
+        assert result['total']['requests'] == 60, (
+            'Проверьте, что команда `benchmark` выполняет заданное количество запросов'
+        )
+        assert result['total']['errors'] == 0, result['scenarios']
+        assert set(result['scenarios']) == {'browse', 'filter', 'comments', 'review', 'token'}
+        for name, summary in result['scenarios'].items():
+            assert {'p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps',
+                    'queries_per_request'} <= set(summary), (
+                f'Проверьте, что команда `benchmark` выводит статистику сценария {name}'
+            )
+        assert User.objects.count() == users_count, (
+            'Проверьте, что команда `benchmark` удаляет своих пользователей'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_review_pairs_limit(self):
+        from django.core.management.base import CommandError
+        from reviews.models import User
+
+        call_command('generate_dataset', reviews=2, users=2, titles=2,
+                     comments=0, stdout=StringIO())
+        users_count = User.objects.count()
+        with pytest.raises(CommandError):
+            call_command('benchmark', requests=10, warmup=0, users=1,
+                         mix='review=1', stdout=StringIO())
+        assert User.objects.count() == users_count, (
+            'Проверьте, что команда `benchmark` сообщает о нехватке пар для сценария review '
+            'и удаляет своих пользователей'
+        )
@@ -0,0 +1,175 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+IMPORT_ORDER = ('CustomUser', 'Category', 'Genre', 'Title', 'GenreTitle', 'Review', 'Comment')
+
+
+def import_model(model, **options):
+    call_command('import_to_db', 'reviews', model, stdout=StringIO(), **options)
+
+
+class Test20ImportToDb:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_import_relations(self):
+        from reviews.models import Comment, Review, Title
+
+        for model in IMPORT_ORDER[:-2]:
+            import_model(model)
+        with CaptureQueriesContext(connection) as context:
+            import_model('Review')
+        select_queries = [query for query in context.captured_queries
+                          if query['sql'].startswith('SELECT')
+                          and 'reviews_review' not in query['sql']]
+        assert len(select_queries) <= 3, (
+            'Проверьте, что `import_to_db` проверяет связанные объекты '
+            'одним запросом на связанную модель'
+        )
+        import_model('Comment')
+        assert Review.objects.count() and Comment.objects.count()
+        assert Title.objects.exclude(rating=None).exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_missing_relations(self, settings, tmp_path):
+        from reviews.models import Genre, GenreTitle
+
+        (tmp_path / 'GenreTitle.csv').write_text(
+            'id,title_id,genre_id\n1,1,1\n2,5,7\n', encoding='utf-8'
+        )
+        settings.TEST_DATA_DIR = f'{tmp_path}/'
+        with pytest.raises(ValueError) as error:
+            import_model('GenreTitle')
+        assert 'строка 2: title=1' in str(error.value) and 'строка 3: genre=7' in str(error.value), (
+            'Проверьте, что `import_to_db` сообщает об отсутствующих связанных объектах '
+            'с номерами строк'
+        )
+        assert not GenreTitle.objects.exists() and not Genre.objects.exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_invalid_relations(self, settings, tmp_path):
+        from reviews.models import GenreTitle
+
+        (tmp_path / 'GenreTitle.csv').write_text(
+            'id,title_id,genre_id\n1,abc,1\n', encoding='utf-8'
+        )
+        settings.TEST_DATA_DIR = f'{tmp_path}/'
+        with pytest.raises(ValueError) as error:
+            import_model('GenreTitle')
+        assert 'строка 2: title=abc' in str(error.value), (
+            'Проверьте, что `import_to_db` сообщает о нечисловых ссылках '
+            'на связанные объекты с номерами строк'
+        )
+        assert not GenreTitle.objects.exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_batches(self, settings, tmp_path):
+        from reviews.models import Genre
+
+        (tmp_path / 'Genre.csv').write_text(
+            'id,name,slug\n' + ''.join(f'{pk},Жанр {pk},genre-{pk}\n' for pk in range(1, 8)),
+            encoding='utf-8'
+        )
+        settings.TEST_DATA_DIR = f'{tmp_path}/'
+        out = StringIO()
+        call_command('import_to_db', 'reviews', 'Genre', '--batch-size', '3', stdout=out)
+        assert Genre.objects.count() == 7
+        assert 'Записано объектов: 3' in out.getvalue() and 'Записано объектов: 7' in out.getvalue(), (
+            'Проверьте, что `import_to_db` выводит прогресс записи по пачкам'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_transaction_mode(self, settings, tmp_path):
+        from reviews.models import GenreTitle
+
+        import_model('Category')
+        import_model('Genre')
+        import_model('Title')
+        (tmp_path / 'GenreTitle.csv').write_text(
+            'id,title_id,genre_id\n1,1,1\n2,2,1\n3,1,999\n', encoding='utf-8'
+        )
+        settings.TEST_DATA_DIR = f'{tmp_path}/'
+        with pytest.raises(ValueError):
+            import_model('GenreTitle', batch_size=2)
+        assert not GenreTitle.objects.exists(), (
+            'Проверьте, что при ошибке в режиме `--transaction file` данные не записываются'
+        )
+        with pytest.raises(ValueError):
+            import_model('GenreTitle', batch_size=2, transaction='chunk')
+        assert GenreTitle.objects.count() == 2, (
+            'Проверьте, что в режиме `--transaction chunk` записываются пачки без ошибок'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_import_all(self):
+        from reviews.models import Category, Comment, CustomUser, Genre, GenreTitle, Review, Title
+
+        out = StringIO()
+        call_command('import_all', '--workers', '2', stdout=out)
+        output = out.getvalue()
+        positions = [output.index(f'{model} (') for model in ('Category', 'Title', 'GenreTitle', 'Review', 'Comment')]
+        assert positions == sorted(positions), (
+            'Проверьте, что `import_all` загружает связанные модели раньше ссылающихся на них'
+        )
+        assert output.index('CustomUser (') < output.index('Review ('), (
+            'Проверьте, что `import_all` загружает пользователей раньше отзывов'
+        )
+        for model in (Category, Genre, CustomUser, Title, GenreTitle, Review, Comment):
+            assert model.objects.exists(), (
+                f'Проверьте, что `import_all` загружает данные модели {model.__name__}'
+            )
+        assert Title.objects.exclude(rating=None).exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_import_all_validation(self, settings, tmp_path):
+        from reviews.models import Category, Title
+
+        (tmp_path / 'category.csv').write_text('id,name,slug\n1,Фильм,movie\n', encoding='utf-8')
+        (tmp_path / 'titles.csv').write_text(
+            'id,name,year,category\n1,Первое,1994,1\n2,Второе,девяносто,1\n', encoding='utf-8'
+        )
+        settings.TEST_DATA_DIR = f'{tmp_path}/'
+        for workers in ('1', '2'):
+            with pytest.raises(CommandError) as error:
+                call_command('import_all', '--workers', workers, '--batch_size', '1', stdout=StringIO())
+            assert 'строка 3: year' in str(error.value), (
+                'Проверьте, что `import_all` сообщает об ошибках значений с номерами строк'
+            )
+            assert not Category.objects.exists() and not Title.objects.exists(), (
+                'Проверьте, что при ошибке в любом файле `import_all` не записывает данные'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_08_ratings_once_per_file(self, settings, tmp_path):
+        from reviews.models import Review, Title
+
+        for model in IMPORT_ORDER[:-3]:
+            import_model(model)
+        with CaptureQueriesContext(connection) as context:
+            call_command('import_to_db', 'reviews', 'Review', '--batch-size', '5', stdout=StringIO())
+        updates = [query for query in context.captured_queries
+                   if query['sql'].startswith('UPDATE "reviews_title"')]
+        assert len(updates) == 2, (
+            'Проверьте, что `import_to_db` пересчитывает рейтинги произведений один раз на файл'
+        )
+        ratings = dict(Title.objects.values_list('pk', 'rating'))
+        call_command('recalculate_ratings', stdout=StringIO())
+        assert ratings == dict(Title.objects.values_list('pk', 'rating'))
+        Review.objects.all().delete()
+        title_id = Title.objects.values_list('pk', flat=True).first()
+        (tmp_path / 'Review.csv').write_text(
+            'id,title_id,text,author,score,pub_date\n'
+            f'1,{title_id},Отзыв,100,7,2019-09-24T21:08:21.567Z\n'
+            f'2,999,Отзыв,100,3,2019-09-24T21:08:21.567Z\n',
+            encoding='utf-8'
+        )
+        settings.TEST_DATA_DIR = f'{tmp_path}/'
+        with pytest.raises(ValueError):
+            import_model('Review', batch_size=1, transaction='chunk')
+        assert Title.objects.get(pk=title_id).rating == 7, (
+            'Проверьте, что в режиме `chunk` рейтинги записанных пачек пересчитываются и при ошибке'
+        )